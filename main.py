@@ -1,8 +1,13 @@
 import base64
+import hashlib
+import heapq
+import io
+import itertools
 import json
+import math
 import os
+import pickle
 import re
-import shutil
 import struct
 import tempfile
 import asyncio
@@ -10,9 +15,15 @@ import threading
 import time
 import traceback
 import zlib
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
 
 import flet as ft
+import flet.canvas as cv
 
 
 # --- 1. 纯 Python 核心算法：保留旧版计算代码 ---
@@ -46,11 +57,38 @@ def simple_linear_fit(x_list, y_list):
     return slope, intercept, r2
 
 
+def calculate_tlm(w_val, v_val, d_list, currents):
+    r_list = [abs(v_val / (current / 1000.0)) for current in currents]
+    slope, intercept, r2 = simple_linear_fit(d_list, r_list)
+
+    Rc_ohms = intercept / 2
+    Rc_norm = Rc_ohms * (w_val / 1000.0)
+    Rsh = slope * w_val
+    LT = Rc_ohms * w_val / Rsh if Rsh != 0 else 0
+    rho_c = Rc_ohms * LT * w_val * 1e-8
+    return {
+        "r_list": r_list,
+        "slope": slope,
+        "intercept": intercept,
+        "r2": r2,
+        "Rc_ohms": Rc_ohms,
+        "Rc_norm": Rc_norm,
+        "Rsh": Rsh,
+        "LT": LT,
+        "rho_c": rho_c,
+    }
+
+
 HISTORY_LIMIT = 1500
 HISTORY_KEY = "gpt_tlm_history_json_v1"
 PRESETS_KEY = "gpt_tlm_presets_json_v1"
 ACTIVE_PRESET_KEY = "gpt_tlm_active_preset_id_v1"
 TIMER_STATE_KEY = "gpt_tlm_timer_state_json_v1"
+NAMED_TIMERS_KEY = "gpt_tlm_named_timers_json_v1"
+RECIPES_KEY = "gpt_tlm_recipes_json_v1"
+RECIPE_RUN_KEY = "gpt_tlm_recipe_run_json_v1"
+RECIPE_LOG_KEY = "gpt_tlm_recipe_log_json_v1"
+RECIPE_LOG_LIMIT = 200
 
 
 def _new_id(prefix):
@@ -114,6 +152,38 @@ def default_preset():
     }
 
 
+def default_recipes():
+    return [
+        {
+            "id": "litho",
+            "name": "光刻流程",
+            "steps": [
+                {"name": "HMDS", "minutes": 5},
+                {"name": "匀胶", "minutes": 1},
+                {"name": "前烘", "minutes": 1.5},
+                {"name": "曝光", "minutes": 0.5},
+                {"name": "后烘", "minutes": 1.5},
+            ],
+        },
+    ]
+
+
+def normalize_recipe(recipe):
+    steps = []
+    for step in recipe.get("steps") or []:
+        try:
+            minutes = float(step.get("minutes"))
+        except (TypeError, ValueError, AttributeError):
+            continue
+        if minutes > 0:
+            steps.append({"name": str(step.get("name") or f"步骤 {len(steps) + 1}"), "minutes": minutes})
+    return {
+        "id": str(recipe.get("id") or _new_id("recipe")),
+        "name": str(recipe.get("name") or "未命名流程"),
+        "steps": steps,
+    }
+
+
 def normalize_preset(preset):
     base = default_preset()
     merged = {**base, **(preset or {})}
@@ -132,6 +202,30 @@ def normalize_preset(preset):
     }
 
 
+def history_record_export_data(record):
+    snapshot = normalize_preset(record.get("preset_snapshot") or default_preset())
+    w_val = float(record.get("w") or snapshot["width"])
+    v_val = float(record.get("v") or snapshot["voltage"])
+    pairs = [(float(d), float(current)) for d, current in record.get("inputs", [])]
+    d_list = [d for d, _ in pairs]
+    currents = [current for _, current in pairs]
+    if len(d_list) < 2:
+        raise ValueError(f"记录 {record.get('name', '')} 少于 2 个数据点")
+    return {
+        "name": record.get("name") or "TLM",
+        "time": record.get("time", ""),
+        "preset_id": snapshot["id"],
+        "preset_name": record.get("preset_name") or snapshot["name"],
+        "preset_snapshot": snapshot,
+        "w": w_val,
+        "v": v_val,
+        "inputs": [[d, current] for d, current in pairs],
+        "d_list": d_list,
+        "currents": currents,
+        **calculate_tlm(w_val, v_val, d_list, currents),
+    }
+
+
 def safe_filename(name):
     cleaned = re.sub(r'[\\/:*?"<>|\r\n]+', "_", (name or "").strip())
     cleaned = re.sub(r"\s+", "_", cleaned).strip("._ ")
@@ -146,7 +240,36 @@ def is_android_runtime():
     )
 
 
-def default_export_dir():
+# 导出目录只探测一次：Android 的 FUSE 存储上每次 mkdir + 写测试文件都要几十毫秒。
+# 写入失败或 App 从后台恢复时再重新探测。
+_EXPORT_DIR_CACHE = {"path": None}
+_EXPORT_DIR_LOCK = threading.Lock()
+
+
+def default_export_dir(refresh=False):
+    with _EXPORT_DIR_LOCK:
+        if refresh or _EXPORT_DIR_CACHE["path"] is None:
+            _EXPORT_DIR_CACHE["path"] = _probe_export_dir()
+        return _EXPORT_DIR_CACHE["path"]
+
+
+def invalidate_export_dir(directory=None):
+    with _EXPORT_DIR_LOCK:
+        if directory is None or _EXPORT_DIR_CACHE["path"] == Path(directory):
+            _EXPORT_DIR_CACHE["path"] = None
+
+
+def prefetch_export_dir():
+    def worker():
+        try:
+            default_export_dir()
+        except Exception:
+            pass
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def _probe_export_dir():
     candidates = []
     android_runtime = is_android_runtime()
 
@@ -288,11 +411,10 @@ def _put_rect(buf, width, height, x1, y1, x2, y2, color):
     y1, y2 = sorted((int(y1), int(y2)))
     x1, x2 = max(0, min(width - 1, x1)), max(0, min(width - 1, x2))
     y1, y2 = max(0, min(height - 1, y1)), max(0, min(height - 1, y2))
+    span = color * (x2 - x1 + 1)
     for y in range(y1, y2 + 1):
         row = (y * width + x1) * 3
-        for _ in range(x1, x2 + 1):
-            buf[row:row + 3] = color
-            row += 3
+        buf[row:row + len(span)] = span
 
 
 def _put_line(buf, width, height, x1, y1, x2, y2, color, thickness=1):
@@ -321,15 +443,23 @@ def _put_circle(buf, width, height, cx, cy, radius, color):
     color = _rgb(color) if isinstance(color, str) else color
     cx, cy, radius = int(round(cx)), int(round(cy)), int(radius)
     r2 = radius * radius
-    for y in range(cy - radius, cy + radius + 1):
-        for x in range(cx - radius, cx + radius + 1):
-            if (x - cx) * (x - cx) + (y - cy) * (y - cy) <= r2:
-                _put_rect(buf, width, height, x, y, x, y, color)
+    for y in range(max(0, cy - radius), min(height - 1, cy + radius) + 1):
+        half = math.isqrt(r2 - (y - cy) * (y - cy))
+        _put_rect(buf, width, height, cx - half, y, cx + half, y, color)
 
 
-def _safe_ascii(text):
+_PLAIN_SYMBOLS = {"Ω": "ohm", "μ": "u", "²": "2", "ρ": "rho", "□": "sq", "·": "."}
+
+
+def _plain_text(text):
     text = str(text or "")
-    text = text.replace("Ω", "OHM").replace("μ", "U").replace("²", "2").replace("ρ", "RHO")
+    for symbol, plain in _PLAIN_SYMBOLS.items():
+        text = text.replace(symbol, plain)
+    return re.sub(r"[^\x20-\x7e]+", " ", text).strip()
+
+
+def _safe_ascii(text):
+    text = _plain_text(text)
     text = re.sub(r"[^A-Za-z0-9 .,_:/()\\-]+", " ", text)
     return re.sub(r"\s+", " ", text).strip()
 
@@ -357,7 +487,7 @@ def _put_text(buf, width, height, x, y, text, color="#111827", scale=4):
     return cursor
 
 
-def _png_bytes(width, height, buf):
+def _png_bytes(width, height, buf, dpi=None):
     rows = []
     stride = width * 3
     for y in range(height):
@@ -372,45 +502,189 @@ def _png_bytes(width, height, buf):
             + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
         )
 
+    phys = b""
+    if dpi:
+        pixels_per_meter = int(round(float(dpi) / 0.0254))
+        phys = chunk(b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1))
+
     return (
         b"\x89PNG\r\n\x1a\n"
         + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + phys
         + chunk(b"IDAT", zlib.compress(raw, 6))
         + chunk(b"IEND", b"")
     )
 
 
-def generate_16x9_png_basic(data, output_dir=None):
-    output_dir = Path(output_dir or default_export_dir())
-    output_dir.mkdir(parents=True, exist_ok=True)
-    stamp = time.strftime("%Y%m%d_%H%M%S")
-    export_time = time.strftime("%Y-%m-%d %H:%M:%S")
-    filename = f"{safe_filename(data.get('name'))}_{stamp}_16x9.png"
-    path = output_dir / filename
+# --- 导出尺寸：同一套 1600×900 版式按比例缩放 ---
+EXPORT_BASE_WIDTH = 1600
+EXPORT_BASE_HEIGHT = 900
+FLET_EXPORT_WIDTH = 960
+FLET_EXPORT_HEIGHT = 540
+FLET_CAPTURE_TIMEOUT = 1.5
+FLET_CAPTURE_RETRY = 0.05
+DEFAULT_EXPORT_PROFILE = "standard"
+SHARE_EXPORT_PROFILE = "share"
+SHARE_QUALITY_RANGE = (30, 92)
+EXPORT_PROFILES = {
+    "thumbnail": {"label": "缩略图 480×270", "width": 480, "height": 270, "dpi": 72},
+    "preview": {"label": "预览 960×540", "width": 960, "height": 540, "dpi": 96},
+    "standard": {"label": "标准 1600×900", "width": 1600, "height": 900, "dpi": 144},
+    "1080p": {"label": "1080p 1920×1080", "width": 1920, "height": 1080, "dpi": 144},
+    "4k": {"label": "4K 3840×2160", "width": 3840, "height": 2160, "dpi": 144},
+    "print": {"label": "打印 300 dpi 3200×1800", "width": 3200, "height": 1800, "dpi": 300},
+    # 分享用有损格式，质量按字节预算二分查找
+    "share": {"label": "分享 1600×900", "width": 1600, "height": 900, "dpi": 96, "format": "webp", "max_bytes": 200 * 1024},
+}
+EXPORT_FORMAT_EXT = {"png": "png", "webp": "webp", "jpeg": "jpg"}
 
-    width, height = 1600, 900
-    buf = bytearray(_rgb("#f7f9fc") * (width * height))
-    d_list = [float(v) for v in data["d_list"]]
-    r_list = [float(v) for v in data["r_list"]]
-    currents = [float(v) for v in data["currents"]]
-    slope = float(data["slope"])
-    intercept = float(data["intercept"])
 
-    _put_text(buf, width, height, 70, 42, data.get("name") or "TLM ANALYSIS", "#111827", 7)
-    _put_text(buf, width, height, 70, 106, f"W={data['w']:.4g} um  V={data['v']:.4g} V  {export_time}", "#425466", 4)
+def image_payload_format(payload):
+    # 按文件头判断实际编码：Pillow 渲染失败退回纯 Python 后端时，有损档位拿到的也是 PNG
+    head = bytes(payload[:12])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:2] == b"\xff\xd8":
+        return "jpeg"
+    return "png"
 
-    chart_x, chart_y, chart_w, chart_h = 80, 170, 560, 500
-    _put_rect(buf, width, height, chart_x, chart_y, chart_x + chart_w, chart_y + chart_h, "#ffffff")
-    _put_line(buf, width, height, chart_x, chart_y, chart_x + chart_w, chart_y, "#cbd5e1", 2)
-    _put_line(buf, width, height, chart_x, chart_y + chart_h, chart_x + chart_w, chart_y + chart_h, "#334155", 3)
-    _put_line(buf, width, height, chart_x, chart_y, chart_x, chart_y + chart_h, "#334155", 3)
-    _put_line(buf, width, height, chart_x + chart_w, chart_y, chart_x + chart_w, chart_y + chart_h, "#cbd5e1", 2)
-    for i in range(1, 5):
-        gx = chart_x + chart_w * i / 5
-        gy = chart_y + chart_h * i / 5
-        _put_line(buf, width, height, gx, chart_y, gx, chart_y + chart_h, "#e2e8f0", 1)
-        _put_line(buf, width, height, chart_x, gy, chart_x + chart_w, gy, "#e2e8f0", 1)
 
+def get_export_profile(profile=None):
+    if isinstance(profile, dict):
+        return profile
+    key = profile if profile in EXPORT_PROFILES else DEFAULT_EXPORT_PROFILE
+    spec = EXPORT_PROFILES[key]
+    return {
+        **spec,
+        "key": key,
+        "scale": spec["width"] / EXPORT_BASE_WIDTH,
+    }
+
+
+def export_format(profile=None):
+    # 没有 Pillow 只能输出 PNG；Pillow 没编译 WebP 时退到 JPEG
+    fmt = get_export_profile(profile).get("format", "png")
+    if fmt == "png":
+        return fmt
+    try:
+        from PIL import features
+    except ImportError:
+        return "png"
+    if fmt == "webp" and not features.check("webp"):
+        return "jpeg"
+    return fmt
+
+
+def export_stamp():
+    now = time.time()
+    return f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}"
+
+
+def export_file_name(data, profile=None, ext=None, payload=None):
+    profile = get_export_profile(profile)
+    if ext is None and payload is not None:
+        ext = EXPORT_FORMAT_EXT[image_payload_format(payload)]
+    ext = ext or EXPORT_FORMAT_EXT[export_format(profile)]
+    suffix = "16x9" if profile["key"] == DEFAULT_EXPORT_PROFILE else f"16x9_{profile['key']}"
+    return f"{safe_filename(data.get('name'))}_{export_stamp()}_{suffix}.{ext}"
+
+
+def reserve_export_path(output_dir, file_name, payload=None):
+    # 用独占创建占住文件名：同一毫秒、多进程批量导出时也不会互相覆盖。
+    # 传入 payload 时在同一个句柄里直接写完，文件只打开、写入一次。
+    output_dir = Path(output_dir)
+    try:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        invalidate_export_dir(output_dir)
+        raise
+    stem, dot, ext = file_name.rpartition(".")
+    for index in range(1, 1000):
+        candidate = output_dir / (file_name if index == 1 else f"{stem}_{index}{dot}{ext}")
+        try:
+            with open(candidate, "xb") as f:
+                if payload is not None:
+                    f.write(payload)
+            return candidate
+        except FileExistsError:
+            continue
+        except OSError:
+            # 缓存的导出目录失效（权限被收回、存储被卸载），下次导出重新探测
+            invalidate_export_dir(output_dir)
+            raise
+    raise FileExistsError(f"无法生成不重复的文件名: {file_name}")
+
+
+# --- 导出缓存：同一组结果 + 同一尺寸只渲染一次，按 LRU 淘汰 ---
+EXPORT_CACHE_MAX_ENTRIES = 16
+EXPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_EXPORT_CACHE = OrderedDict()
+_EXPORT_CACHE_LOCK = threading.Lock()
+
+
+def export_cache_key(data, profile=None):
+    # 只取真正画到图上的输入；计算结果由输入唯一决定，不必参与哈希
+    payload = {
+        "name": data.get("name") or "",
+        "w": float(data["w"]),
+        "v": float(data["v"]),
+        "d_list": [float(v) for v in data["d_list"]],
+        "currents": [float(v) for v in data["currents"]],
+    }
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest, get_export_profile(profile)["key"]
+
+
+def export_cache_get(key):
+    # 返回 {"path", "bytes"}：已落盘的文件路径和/或内存中的图片数据
+    with _EXPORT_CACHE_LOCK:
+        entry = _EXPORT_CACHE.get(key)
+        if entry is None:
+            return None
+        if entry["path"] and not os.path.exists(entry["path"]):
+            entry["path"] = None
+        if entry["path"] is None and entry["bytes"] is None:
+            del _EXPORT_CACHE[key]
+            return None
+        _EXPORT_CACHE.move_to_end(key)
+        return dict(entry)
+
+
+def export_cache_put(key, path=None, payload=None):
+    with _EXPORT_CACHE_LOCK:
+        entry = _EXPORT_CACHE.get(key) or {"path": None, "bytes": None}
+        if path:
+            entry["path"] = str(path)
+        if payload is not None:
+            entry["bytes"] = payload
+        _EXPORT_CACHE[key] = entry
+        _EXPORT_CACHE.move_to_end(key)
+        total = sum(len(e["bytes"]) for e in _EXPORT_CACHE.values() if e["bytes"] is not None)
+        while len(_EXPORT_CACHE) > 1 and (
+            len(_EXPORT_CACHE) > EXPORT_CACHE_MAX_ENTRIES or total > EXPORT_CACHE_MAX_BYTES
+        ):
+            _, evicted = _EXPORT_CACHE.popitem(last=False)
+            if evicted["bytes"] is not None:
+                total -= len(evicted["bytes"])
+
+
+def export_cache_find_png(digest, min_width=0):
+    # 同一份数据已经导出过的 PNG（任意尺寸档位，宽度够用即可），分享时直接转码而不必重画
+    with _EXPORT_CACHE_LOCK:
+        candidates = [
+            (key, dict(entry)) for (entry_digest, key), entry in reversed(_EXPORT_CACHE.items())
+            if entry_digest == digest
+        ]
+    for key, entry in candidates:
+        spec = EXPORT_PROFILES.get(key)
+        if not spec or spec.get("format", "png") != "png" or spec["width"] < min_width:
+            continue
+        if entry["bytes"] is not None or (entry["path"] and os.path.exists(entry["path"])):
+            return entry
+    return None
+
+
+def _chart_ranges(d_list, r_list, slope, intercept):
     x_min, x_max = min(d_list), max(d_list)
     if x_min == x_max:
         x_min -= 1
@@ -424,8 +698,80 @@ def generate_16x9_png_basic(data, output_dir=None):
         y_min -= 1
         y_max += 1
     y_pad = max((y_max - y_min) * 0.12, 1)
-    y_min -= y_pad
-    y_max += y_pad
+    return line_x, line_y, y_min - y_pad, y_max + y_pad
+
+
+# --- 导出版式：场景只计算一次，各后端只负责栅格化或序列化 ---
+EXPORT_CHART_BOX = (80, 175, 560, 500)
+EXPORT_INFO_ORIGIN = (760, 198)
+EXPORT_TABLE_BOX = (80, 730, 1320, 52)
+EXPORT_METRIC_LABELS = ("R²", "Rsh", "Rc", "LT", "ρc")
+
+
+def _scene_rect(x, y, w, h, fill=None, stroke=None, width=1):
+    return {"kind": "rect", "x": x, "y": y, "w": w, "h": h, "fill": fill, "stroke": stroke, "width": width}
+
+
+def _scene_line(x1, y1, x2, y2, color, width=1):
+    return {"kind": "line", "x1": x1, "y1": y1, "x2": x2, "y2": y2, "color": color, "width": width}
+
+
+def _scene_circle(cx, cy, r, fill, stroke=None):
+    return {"kind": "circle", "cx": cx, "cy": cy, "r": r, "fill": fill, "stroke": stroke}
+
+
+def _scene_text(x, y, text, size, color, bold=False):
+    return {"kind": "text", "x": x, "y": y, "text": str(text), "size": size, "color": color, "bold": bold}
+
+
+_EXPORT_STATIC_SCENE = []
+
+
+def export_static_scene():
+    if _EXPORT_STATIC_SCENE:
+        return _EXPORT_STATIC_SCENE
+
+    chart_x, chart_y, chart_w, chart_h = EXPORT_CHART_BOX
+    info_x, info_y = EXPORT_INFO_ORIGIN
+    table_x, table_y, table_w, row_h = EXPORT_TABLE_BOX
+    items = [
+        _scene_rect(0, 0, EXPORT_BASE_WIDTH, EXPORT_BASE_HEIGHT, fill="#f7f9fc"),
+        _scene_rect(chart_x, chart_y, chart_w, chart_h, fill="#ffffff", stroke="#cbd5e1", width=2),
+    ]
+    for i in range(1, 5):
+        gx = chart_x + chart_w * i / 5
+        gy = chart_y + chart_h * i / 5
+        items.append(_scene_line(gx, chart_y, gx, chart_y + chart_h, "#e2e8f0", 1))
+        items.append(_scene_line(chart_x, gy, chart_x + chart_w, gy, "#e2e8f0", 1))
+    items.extend([
+        _scene_line(chart_x, chart_y + chart_h, chart_x + chart_w, chart_y + chart_h, "#334155", 4),
+        _scene_line(chart_x, chart_y, chart_x, chart_y + chart_h, "#334155", 4),
+        _scene_text(chart_x + 150, chart_y + chart_h + 26, "Spacing d (μm)", 30, "#425466"),
+        _scene_text(chart_x + 18, chart_y + 18, "R (Ω)", 30, "#425466"),
+        _scene_text(info_x, info_y, "Results", 58, "#111827", bold=True),
+    ])
+    for index, label in enumerate(EXPORT_METRIC_LABELS):
+        items.append(_scene_text(info_x, info_y + 92 + index * 58, label, 28, "#5b677a", bold=True))
+    items.extend([
+        _scene_rect(table_x, table_y, table_w, row_h * 3, fill="#ffffff", stroke="#334155", width=3),
+        _scene_rect(table_x, table_y, table_w, row_h, fill="#eef3f8", stroke="#334155", width=3),
+        _scene_line(table_x, table_y + row_h * 2, table_x + table_w, table_y + row_h * 2, "#334155", 2),
+        _scene_text(table_x + 34, table_y + 10, "Inputs", 28, "#111827", bold=True),
+    ])
+    _EXPORT_STATIC_SCENE.extend(items)
+    return _EXPORT_STATIC_SCENE
+
+
+def build_export_scene(data, export_time=None):
+    export_time = time.strftime("%Y-%m-%d %H:%M:%S") if export_time is None else export_time
+    d_list = [float(v) for v in data["d_list"]]
+    r_list = [float(v) for v in data["r_list"]]
+    currents = [float(v) for v in data["currents"]]
+    slope = float(data["slope"])
+    intercept = float(data["intercept"])
+
+    chart_x, chart_y, chart_w, chart_h = EXPORT_CHART_BOX
+    line_x, line_y, y_min, y_max = _chart_ranges(d_list, r_list, slope, intercept)
     x_min, x_max = line_x
 
     def map_x(value):
@@ -434,39 +780,109 @@ def generate_16x9_png_basic(data, output_dir=None):
     def map_y(value):
         return chart_y + chart_h - (float(value) - y_min) / (y_max - y_min) * chart_h
 
-    _put_line(buf, width, height, map_x(line_x[0]), map_y(line_y[0]), map_x(line_x[1]), map_y(line_y[1]), "#2196f3", 8)
+    items = [
+        _scene_text(70, 36, data.get("name") or "TLM Analysis", 58, "#111827", bold=True),
+        _scene_text(70, 108, f"W={data['w']:.4g} μm    V={data['v']:.4g} V    {export_time}", 30, "#425466"),
+        _scene_line(map_x(line_x[0]), map_y(line_y[0]), map_x(line_x[1]), map_y(line_y[1]), "#2196f3", 9),
+    ]
     for d, r in zip(d_list, r_list):
-        _put_circle(buf, width, height, map_x(d), map_y(r), 15, "#f44336")
-    _put_text(buf, width, height, chart_x + 120, chart_y + chart_h + 26, "SPACING D (UM)", "#425466", 4)
-    _put_text(buf, width, height, chart_x + 18, chart_y + 18, "R (OHM)", "#425466", 4)
-
-    info_x, info_y = 760, 200
-    _put_text(buf, width, height, info_x, info_y, "RESULTS", "#111827", 7)
-    lines = [
-        f"R2  {data['r2']:.5f}",
-        f"RSH {data['Rsh']:.2f} OHM/SQ",
-        f"RC  {data['Rc_norm']:.4f} OHM.MM",
-        f"LT  {data['LT']:.4f} UM",
-        f"RHO {data['rho_c']:.2E} OHM.CM2",
+        items.append(_scene_circle(map_x(d), map_y(r), 15, "#f44336", "#b91c1c"))
+
+    info_x, info_y = EXPORT_INFO_ORIGIN
+    metrics = [
+        f"{data['r2']:.5f}",
+        f"{data['Rsh']:.2f} Ω/□",
+        f"{data['Rc_norm']:.4f} Ω·mm",
+        f"{data['LT']:.4f} μm",
+        f"{data['rho_c']:.2E} Ω·cm²",
     ]
-    for index, line in enumerate(lines):
-        _put_text(buf, width, height, info_x, info_y + 78 + index * 56, line, "#1565c0", 5)
-
-    table_x, table_y, table_w, row_h = 80, 730, 1320, 52
-    _put_rect(buf, width, height, table_x, table_y, table_x + table_w, table_y + row_h * 3, "#ffffff")
-    _put_rect(buf, width, height, table_x, table_y, table_x + table_w, table_y + row_h, "#eef3f8")
-    for row_index in range(4):
-        y = table_y + row_index * row_h
-        _put_line(buf, width, height, table_x, y, table_x + table_w, y, "#334155", 2)
-    _put_line(buf, width, height, table_x, table_y, table_x, table_y + row_h * 3, "#334155", 2)
-    _put_line(buf, width, height, table_x + table_w, table_y, table_x + table_w, table_y + row_h * 3, "#334155", 2)
-    _put_text(buf, width, height, table_x + 34, table_y + 14, "INPUTS", "#111827", 4)
-    d_values = ", ".join(_format_number(d) for d in d_list)
-    i_values = ", ".join(f"{current:g}" for current in currents)
-    _put_text(buf, width, height, table_x + 34, table_y + row_h + 14, f"D (UM): {d_values}", "#111827", 4)
-    _put_text(buf, width, height, table_x + 34, table_y + row_h * 2 + 14, f"I (MA): {i_values}", "#111827", 4)
-
-    path.write_bytes(_png_bytes(width, height, buf))
+    for index, value in enumerate(metrics):
+        items.append(_scene_text(info_x + 110, info_y + 84 + index * 58, value, 42, "#1565c0", bold=True))
+
+    table_x, table_y, _, row_h = EXPORT_TABLE_BOX
+    items.extend([
+        _scene_text(table_x + 34, table_y + row_h + 10, f"d (μm): {', '.join(_format_number(d) for d in d_list)}", 30, "#111827"),
+        _scene_text(table_x + 34, table_y + row_h * 2 + 10, f"I (mA): {', '.join(f'{i:g}' for i in currents)}", 30, "#111827"),
+    ])
+    return {
+        "width": EXPORT_BASE_WIDTH,
+        "height": EXPORT_BASE_HEIGHT,
+        "static": export_static_scene(),
+        "dynamic": items,
+        "chart": {
+            "min_x": x_min,
+            "max_x": x_max,
+            "min_y": y_min,
+            "max_y": y_max,
+            "line_x": line_x,
+            "line_y": line_y,
+        },
+    }
+
+
+# --- 纯 Python 后端：5×7 点阵字体，无需任何依赖 ---
+_BASIC_TEMPLATE_CACHE = {}
+
+
+def _basic_draw(buf, width, height, items, s):
+    def stroke(value):
+        return max(1, int(round(value * s)))
+
+    for item in items:
+        kind = item["kind"]
+        if kind == "rect":
+            x1, y1 = item["x"] * s, item["y"] * s
+            x2, y2 = (item["x"] + item["w"]) * s, (item["y"] + item["h"]) * s
+            if item["fill"]:
+                _put_rect(buf, width, height, x1, y1, x2, y2, item["fill"])
+            if item["stroke"]:
+                t = stroke(item["width"])
+                _put_line(buf, width, height, x1, y1, x2, y1, item["stroke"], t)
+                _put_line(buf, width, height, x2, y1, x2, y2, item["stroke"], t)
+                _put_line(buf, width, height, x2, y2, x1, y2, item["stroke"], t)
+                _put_line(buf, width, height, x1, y2, x1, y1, item["stroke"], t)
+        elif kind == "line":
+            _put_line(
+                buf, width, height,
+                item["x1"] * s, item["y1"] * s, item["x2"] * s, item["y2"] * s,
+                item["color"], stroke(item["width"]),
+            )
+        elif kind == "circle":
+            radius = stroke(item["r"])
+            if item["stroke"]:
+                _put_circle(buf, width, height, item["cx"] * s, item["cy"] * s, radius, item["stroke"])
+                radius = max(1, radius - stroke(1))
+            _put_circle(buf, width, height, item["cx"] * s, item["cy"] * s, radius, item["fill"])
+        elif kind == "text":
+            scale = max(1, int(round(item["size"] * s / 7.5)))
+            _put_text(buf, width, height, int(item["x"] * s), int(item["y"] * s), item["text"], item["color"], scale)
+
+
+def _basic_template(profile):
+    cached = _BASIC_TEMPLATE_CACHE.get(profile["key"])
+    if cached is not None:
+        return cached
+    width, height = profile["width"], profile["height"]
+    buf = bytearray(_rgb("#f7f9fc") * (width * height))
+    _basic_draw(buf, width, height, export_static_scene(), profile["scale"])
+    cached = bytes(buf)
+    _BASIC_TEMPLATE_CACHE[profile["key"]] = cached
+    return cached
+
+
+def render_16x9_png_basic(data, profile=None, scene=None):
+    profile = get_export_profile(profile)
+    scene = scene or build_export_scene(data)
+    width, height = profile["width"], profile["height"]
+
+    buf = bytearray(_basic_template(profile))
+    _basic_draw(buf, width, height, scene["dynamic"], profile["scale"])
+    return _png_bytes(width, height, buf, profile["dpi"])
+
+
+def generate_16x9_png_basic(data, output_dir=None, profile=None, scene=None):
+    png = render_16x9_png_basic(data, profile, scene)
+    path = reserve_export_path(output_dir or default_export_dir(), export_file_name(data, profile, payload=png), png)
     return str(path)
 
 
@@ -493,127 +909,797 @@ def _font_candidates(bold=False):
     return paths
 
 
-def generate_16x9_png_pillow(data, output_dir=None):
-    from PIL import Image, ImageDraw, ImageFont
+# --- Pillow 后端：系统 TrueType 字体，Android 打包已包含 Pillow ---
+_PILLOW_FONT_CACHE = {}
+_PILLOW_TEMPLATE_CACHE = {}
 
-    output_dir = Path(output_dir or default_export_dir())
-    output_dir.mkdir(parents=True, exist_ok=True)
-    stamp = time.strftime("%Y%m%d_%H%M%S")
-    export_time = time.strftime("%Y-%m-%d %H:%M:%S")
-    path = output_dir / f"{safe_filename(data.get('name'))}_{stamp}_16x9.png"
-
-    def font(size, bold=False):
-        for candidate in _font_candidates(bold):
-            if candidate.exists():
-                try:
-                    return ImageFont.truetype(str(candidate), size=size)
-                except Exception:
-                    pass
+
+def _pillow_font(size, bold=False):
+    from PIL import ImageFont
+
+    key = (int(size), bool(bold))
+    if key in _PILLOW_FONT_CACHE:
+        return _PILLOW_FONT_CACHE[key]
+    loaded = None
+    for candidate in _font_candidates(bold):
+        if candidate.exists():
+            try:
+                loaded = ImageFont.truetype(str(candidate), size=key[0])
+                break
+            except Exception:
+                pass
+    if loaded is None:
         try:
-            return ImageFont.truetype("DejaVuSerif-Bold.ttf" if bold else "DejaVuSerif.ttf", size=size)
+            loaded = ImageFont.truetype("DejaVuSerif-Bold.ttf" if bold else "DejaVuSerif.ttf", size=key[0])
         except Exception:
-            return ImageFont.load_default()
-
-    width, height = 1600, 900
-    image = Image.new("RGB", (width, height), "#f7f9fc")
-    draw = ImageDraw.Draw(image)
-
-    title_font = font(58, bold=True)
-    subtitle_font = font(30)
-    label_font = font(28, bold=True)
-    text_font = font(30)
-    metric_font = font(42, bold=True)
-
-    title = _safe_ascii(data.get("name") or "TLM Analysis")
-    draw.text((70, 36), title, fill="#111827", font=title_font)
-    draw.text(
-        (70, 108),
-        f"W={data['w']:.4g} um    V={data['v']:.4g} V    {export_time}",
-        fill="#425466",
-        font=subtitle_font,
+            loaded = ImageFont.load_default()
+    _PILLOW_FONT_CACHE[key] = loaded
+    return loaded
+
+
+def _pillow_draw(draw, items, s):
+    def stroke(value):
+        return max(1, int(round(value * s)))
+
+    for item in items:
+        kind = item["kind"]
+        if kind == "rect":
+            box = (item["x"] * s, item["y"] * s, (item["x"] + item["w"]) * s, (item["y"] + item["h"]) * s)
+            draw.rectangle(box, fill=item["fill"], outline=item["stroke"], width=stroke(item["width"]))
+        elif kind == "line":
+            draw.line(
+                (item["x1"] * s, item["y1"] * s, item["x2"] * s, item["y2"] * s),
+                fill=item["color"],
+                width=stroke(item["width"]),
+            )
+        elif kind == "circle":
+            x, y, radius = item["cx"] * s, item["cy"] * s, stroke(item["r"])
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=item["fill"], outline=item["stroke"])
+        elif kind == "text":
+            font = _pillow_font(max(8, int(round(item["size"] * s))), bold=item["bold"])
+            draw.text((item["x"] * s, item["y"] * s), _plain_text(item["text"]), fill=item["color"], font=font)
+
+
+def _pillow_template(profile):
+    from PIL import Image, ImageDraw
+
+    cached = _PILLOW_TEMPLATE_CACHE.get(profile["key"])
+    if cached is not None:
+        return cached
+    image = Image.new("RGB", (profile["width"], profile["height"]), "#f7f9fc")
+    _pillow_draw(ImageDraw.Draw(image), export_static_scene(), profile["scale"])
+    _PILLOW_TEMPLATE_CACHE[profile["key"]] = image
+    return image
+
+
+def render_16x9_png_pillow(data, profile=None, scene=None):
+    from PIL import ImageDraw
+
+    profile = get_export_profile(profile)
+    scene = scene or build_export_scene(data)
+
+    image = _pillow_template(profile).copy()
+    _pillow_draw(ImageDraw.Draw(image), scene["dynamic"], profile["scale"])
+
+    dpi = profile["dpi"]
+    fmt = export_format(profile)
+    if fmt != "png":
+        return encode_lossy_image(image, fmt, profile.get("max_bytes"), dpi)
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=True, dpi=(dpi, dpi))
+    return out.getbuffer()
+
+
+def encode_lossy_image(image, fmt, max_bytes=None, dpi=None):
+    # 二分查找预算内的最高质量；全都超预算时返回试过的最小结果
+    def encode(quality):
+        out = io.BytesIO()
+        options = {"quality": quality}
+        if fmt == "jpeg":
+            options.update(optimize=True, dpi=(dpi, dpi) if dpi else None)
+        else:
+            options["method"] = 4
+        image.save(out, format=fmt.upper(), **{k: v for k, v in options.items() if v is not None})
+        return out.getbuffer()
+
+    low, high = SHARE_QUALITY_RANGE
+    smallest = encode(high)
+    if not max_bytes or len(smallest) <= max_bytes:
+        return smallest
+    best = None
+    high -= 1
+    while low <= high:
+        quality = (low + high) // 2
+        encoded = encode(quality)
+        if len(encoded) <= max_bytes:
+            best = encoded
+            low = quality + 1
+        else:
+            high = quality - 1
+        if smallest is None or len(encoded) < len(smallest):
+            smallest = encoded
+    return best if best is not None else smallest
+
+
+def transcode_export_image(source, profile=None):
+    # source 是缓存条目 {"path", "bytes"}；缩放到目标尺寸后按档位格式重新编码
+    from PIL import Image
+
+    profile = get_export_profile(profile)
+    raw = source["bytes"] if source["bytes"] is not None else Path(source["path"]).read_bytes()
+    with Image.open(io.BytesIO(raw)) as opened:
+        image = opened.convert("RGB")
+    size = (profile["width"], profile["height"])
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    fmt = export_format(profile)
+    if fmt == "png":
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True, dpi=(profile["dpi"], profile["dpi"]))
+        return out.getbuffer()
+    return encode_lossy_image(image, fmt, profile.get("max_bytes"), profile["dpi"])
+
+
+def generate_16x9_png_pillow(data, output_dir=None, profile=None, scene=None):
+    png = render_16x9_png_pillow(data, profile, scene)
+    path = reserve_export_path(output_dir or default_export_dir(), export_file_name(data, profile, payload=png), png)
+    return str(path)
+
+
+# --- SVG 后端：矢量元素，坐标直接使用 1600×900 基准版式 ---
+_SVG_STATIC_CACHE = []
+
+
+def _svg_elements(items):
+    parts = []
+    for item in items:
+        kind = item["kind"]
+        if kind == "rect":
+            fill = item["fill"] or "none"
+            stroke = f' stroke="{item["stroke"]}" stroke-width="{item["width"]:g}"' if item["stroke"] else ""
+            parts.append(f'<rect x="{item["x"]:g}" y="{item["y"]:g}" width="{item["w"]:g}" height="{item["h"]:g}" fill="{fill}"{stroke}/>')
+        elif kind == "line":
+            parts.append(
+                f'<line x1="{item["x1"]:.2f}" y1="{item["y1"]:.2f}" x2="{item["x2"]:.2f}" y2="{item["y2"]:.2f}" '
+                f'stroke="{item["color"]}" stroke-width="{item["width"]:g}"/>'
+            )
+        elif kind == "circle":
+            stroke = f' stroke="{item["stroke"]}"' if item["stroke"] else ""
+            parts.append(f'<circle cx="{item["cx"]:.2f}" cy="{item["cy"]:.2f}" r="{item["r"]:g}" fill="{item["fill"]}"{stroke}/>')
+        elif kind == "text":
+            weight = ' font-weight="bold"' if item["bold"] else ""
+            parts.append(
+                f'<text x="{item["x"]:g}" y="{item["y"] + item["size"] * 0.8:.1f}" font-size="{item["size"]:g}"{weight} '
+                f'fill="{item["color"]}">{xml_escape(item["text"])}</text>'
+            )
+    return parts
+
+
+def generate_16x9_svg(data, output_dir=None, profile=None, scene=None):
+    profile = get_export_profile(profile)
+    output_dir = Path(output_dir or default_export_dir())
+    scene = scene or build_export_scene(data)
+    if not _SVG_STATIC_CACHE:
+        _SVG_STATIC_CACHE.extend(_svg_elements(export_static_scene()))
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{profile["width"]}" height="{profile["height"]}" '
+        f'viewBox="0 0 {scene["width"]} {scene["height"]}" xml:space="preserve" '
+        'font-family="Times New Roman, Noto Serif, DejaVu Serif, serif">',
+        *_SVG_STATIC_CACHE,
+        *_svg_elements(scene["dynamic"]),
+        "</svg>",
+    ]
+
+    svg = "\n".join(parts).encode("utf-8")
+    path = reserve_export_path(output_dir, export_file_name(data, profile, ext="svg"), svg)
+    return str(path)
+
+
+# --- Flet 后端：同一场景画到 Canvas 上，再用 Screenshot 截图 ---
+def _flet_shapes(items, s):
+    shapes = []
+    for item in items:
+        kind = item["kind"]
+        if kind == "rect":
+            if item["fill"]:
+                shapes.append(cv.Rect(
+                    item["x"] * s, item["y"] * s, item["w"] * s, item["h"] * s,
+                    paint=ft.Paint(color=item["fill"], style=ft.PaintingStyle.FILL),
+                ))
+            if item["stroke"]:
+                shapes.append(cv.Rect(
+                    item["x"] * s, item["y"] * s, item["w"] * s, item["h"] * s,
+                    paint=ft.Paint(color=item["stroke"], stroke_width=item["width"] * s, style=ft.PaintingStyle.STROKE),
+                ))
+        elif kind == "line":
+            shapes.append(cv.Line(
+                item["x1"] * s, item["y1"] * s, item["x2"] * s, item["y2"] * s,
+                paint=ft.Paint(color=item["color"], stroke_width=item["width"] * s),
+            ))
+        elif kind == "circle":
+            shapes.append(cv.Circle(
+                item["cx"] * s, item["cy"] * s, item["r"] * s,
+                paint=ft.Paint(color=item["fill"], style=ft.PaintingStyle.FILL),
+            ))
+            if item["stroke"]:
+                shapes.append(cv.Circle(
+                    item["cx"] * s, item["cy"] * s, item["r"] * s,
+                    paint=ft.Paint(color=item["stroke"], stroke_width=s, style=ft.PaintingStyle.STROKE),
+                ))
+        elif kind == "text":
+            shapes.append(cv.Text(
+                item["x"] * s, item["y"] * s, item["text"],
+                style=ft.TextStyle(size=item["size"] * s, weight="bold" if item["bold"] else None, color=item["color"]),
+            ))
+    return shapes
+
+
+def build_flet_export_image(scene, on_ready=None):
+    # 导出画布常驻在截图控件里：底板（边框、坐标轴、标签）只在创建时发送一次，
+    # 之后每次导出由 set_flet_export_scene 只替换数据相关的图形
+    s = FLET_EXPORT_WIDTH / scene["width"]
+    static_shapes = _flet_shapes(scene["static"], s)
+    return ft.Container(
+        width=FLET_EXPORT_WIDTH,
+        height=FLET_EXPORT_HEIGHT,
+        bgcolor="#f7f9fc",
+        alignment=ft.alignment.top_left,
+        content=cv.Canvas(
+            shapes=static_shapes,
+            width=FLET_EXPORT_WIDTH,
+            height=FLET_EXPORT_HEIGHT,
+            resize_interval=0,
+            on_resize=on_ready,
+            data=len(static_shapes),
+        ),
     )
 
-    d_list = [float(v) for v in data["d_list"]]
-    r_list = [float(v) for v in data["r_list"]]
-    currents = [float(v) for v in data["currents"]]
-    slope = float(data["slope"])
-    intercept = float(data["intercept"])
 
-    chart_x, chart_y, chart_w, chart_h = 80, 175, 560, 500
-    draw.rectangle((chart_x, chart_y, chart_x + chart_w, chart_y + chart_h), fill="white", outline="#cbd5e1", width=2)
-    for i in range(1, 5):
-        gx = chart_x + chart_w * i / 5
-        gy = chart_y + chart_h * i / 5
-        draw.line((gx, chart_y, gx, chart_y + chart_h), fill="#e2e8f0", width=1)
-        draw.line((chart_x, gy, chart_x + chart_w, gy), fill="#e2e8f0", width=1)
-    draw.line((chart_x, chart_y + chart_h, chart_x + chart_w, chart_y + chart_h), fill="#334155", width=4)
-    draw.line((chart_x, chart_y, chart_x, chart_y + chart_h), fill="#334155", width=4)
+def set_flet_export_scene(image, scene):
+    # 画布宽度在 W 与 W-1 之间交替，Flutter 重新布局后触发 on_resize，借此得知新图形已经画好；
+    # 图形不按画布裁剪，截图的是外层固定尺寸的容器，输出不受这 1 像素影响。返回本次的画布宽度
+    canvas = image.content
+    s = FLET_EXPORT_WIDTH / scene["width"]
+    canvas.shapes = canvas.shapes[:canvas.data] + _flet_shapes(scene["dynamic"], s)
+    canvas.width = FLET_EXPORT_WIDTH - 1 if canvas.width == FLET_EXPORT_WIDTH else FLET_EXPORT_WIDTH
+    return canvas.width
 
-    x_min, x_max = min(d_list), max(d_list)
-    if x_min == x_max:
-        x_min -= 1
-        x_max += 1
-    x_pad = max((x_max - x_min) * 0.08, 0.5)
-    line_x = [x_min - x_pad, x_max + x_pad]
-    line_y = [slope * x + intercept for x in line_x]
-    y_values = r_list + line_y
-    y_min, y_max = min(y_values), max(y_values)
-    if y_min == y_max:
-        y_min -= 1
-        y_max += 1
-    y_pad = max((y_max - y_min) * 0.12, 1)
-    y_min -= y_pad
-    y_max += y_pad
+
+# --- PDF 报告：纯 Python 逐页写盘，不依赖原生库 ---
+PDF_PAGE_WIDTH = 960
+PDF_PAGE_HEIGHT = 540
+
+
+def _pdf_text(text):
+    return _plain_text(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_color(color, stroke=False):
+    r, g, b = _rgb(color)
+    return f"{r / 255:.3f} {g / 255:.3f} {b / 255:.3f} {'RG' if stroke else 'rg'}"
+
+
+def _pdf_ops(items):
+    s = PDF_PAGE_WIDTH / EXPORT_BASE_WIDTH
+
+    def X(value):
+        return value * s
+
+    def Y(value):
+        return PDF_PAGE_HEIGHT - value * s
+
+    ops = []
+    for item in items:
+        kind = item["kind"]
+        if kind == "rect":
+            if item["fill"]:
+                ops.append(_pdf_color(item["fill"]))
+            if item["stroke"]:
+                ops.append(_pdf_color(item["stroke"], stroke=True))
+                ops.append(f"{item['width'] * s:.2f} w")
+            paint = "B" if item["fill"] and item["stroke"] else ("f" if item["fill"] else "S")
+            ops.append(f"{X(item['x']):.2f} {Y(item['y'] + item['h']):.2f} {item['w'] * s:.2f} {item['h'] * s:.2f} re {paint}")
+        elif kind == "line":
+            ops.append(_pdf_color(item["color"], stroke=True))
+            ops.append(
+                f"{item['width'] * s:.2f} w {X(item['x1']):.2f} {Y(item['y1']):.2f} m "
+                f"{X(item['x2']):.2f} {Y(item['y2']):.2f} l S"
+            )
+        elif kind == "circle":
+            x, y, r = X(item["cx"]), Y(item["cy"]), item["r"] * s
+            k = 0.5523 * r
+            ops.append(_pdf_color(item["fill"]))
+            ops.append(_pdf_color(item["stroke"] or item["fill"], stroke=True))
+            ops.append(f"{s:.2f} w")
+            ops.append(
+                f"{x + r:.2f} {y:.2f} m "
+                f"{x + r:.2f} {y + k:.2f} {x + k:.2f} {y + r:.2f} {x:.2f} {y + r:.2f} c "
+                f"{x - k:.2f} {y + r:.2f} {x - r:.2f} {y + k:.2f} {x - r:.2f} {y:.2f} c "
+                f"{x - r:.2f} {y - k:.2f} {x - k:.2f} {y - r:.2f} {x:.2f} {y - r:.2f} c "
+                f"{x + k:.2f} {y - r:.2f} {x + r:.2f} {y - k:.2f} {x + r:.2f} {y:.2f} c B"
+            )
+        elif kind == "text":
+            ops.append(_pdf_color(item["color"]))
+            ops.append(
+                f"BT /{'F2' if item['bold'] else 'F1'} {item['size'] * s:.2f} Tf "
+                f"{X(item['x']):.2f} {Y(item['y'] + item['size'] * 0.8):.2f} Td ({_pdf_text(item['text'])}) Tj ET"
+            )
+    return "\n".join(ops).encode("latin-1")
+
+
+_PDF_STATIC_CACHE = []
+
+
+def _pdf_page_stream(data):
+    if not _PDF_STATIC_CACHE:
+        _PDF_STATIC_CACHE.append(_pdf_ops(export_static_scene()))
+    scene = build_export_scene(data, export_time=data.get("time", ""))
+    return _PDF_STATIC_CACHE[0] + b"\n" + _pdf_ops(scene["dynamic"])
+
+
+def write_tlm_pdf_report(records, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    offsets = {}
+    page_ids = []
+    next_id = 5
+
+    try:
+        with open(path, "wb") as f:
+            def write_object(object_id, body):
+                offsets[object_id] = f.tell()
+                f.write(f"{object_id} 0 obj\n".encode("ascii"))
+                f.write(body)
+                f.write(b"\nendobj\n")
+
+            f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+            write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+            write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+            write_object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+            for record in records:
+                data = record if "d_list" in record else history_record_export_data(record)
+                stream = zlib.compress(_pdf_page_stream(data), 6)
+                content_id, page_id = next_id, next_id + 1
+                next_id += 2
+                write_object(
+                    content_id,
+                    f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + stream + b"\nendstream",
+                )
+                write_object(
+                    page_id,
+                    (
+                        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] "
+                        f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+                    ).encode("ascii"),
+                )
+                page_ids.append(page_id)
+
+            if not page_ids:
+                raise ValueError("没有可导出的记录")
+
+            kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+            write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii"))
+
+            xref_offset = f.tell()
+            f.write(f"xref\n0 {next_id}\n0000000000 65535 f \n".encode("ascii"))
+            for object_id in range(1, next_id):
+                f.write(f"{offsets[object_id]:010d} 00000 n \n".encode("ascii"))
+            f.write(f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+    except Exception:
+        # 写到一半失败时删掉残缺的 PDF，免得留下打不开的文件
+        path.unlink(missing_ok=True)
+        raise
+    return str(path)
+
+
+def render_16x9_png(data, profile=None, scene=None):
+    scene = scene or build_export_scene(data)
+    try:
+        return render_16x9_png_pillow(data, profile, scene)
+    except Exception as ex:
+        if is_android_runtime():
+            raise RuntimeError(f"高清图片导出组件 Pillow 不可用，无法生成顺滑字体图片: {ex}")
+        return render_16x9_png_basic(data, profile, scene)
+
+
+def generate_16x9_png(data, output_dir=None, profile=None, scene=None):
+    png = render_16x9_png(data, profile, scene)
+    path = reserve_export_path(output_dir or default_export_dir(), export_file_name(data, profile, payload=png), png)
+    return str(path)
+
+
+def _batch_worker_count():
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def batch_export_pngs(items, output_dir, profile=None, progress=None, cancel_event=None):
+    # 桌面端用进程池并行渲染；Android 上没有可用的子进程，退回线程池。
+    items = list(items)
+    output_dir = str(output_dir)
+    paths, errors = [], []
+    pending = list(range(len(items)))
+    use_processes = not is_android_runtime()
+
+    while pending:
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        try:
+            with executor_cls(max_workers=_batch_worker_count()) as executor:
+                futures = {
+                    executor.submit(generate_16x9_png, items[index], output_dir, profile): index
+                    for index in pending
+                }
+                for future in as_completed(futures):
+                    if cancel_event is not None and cancel_event.is_set():
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return paths, errors
+                    index = futures[future]
+                    try:
+                        paths.append(future.result())
+                    except (BrokenProcessPool, pickle.PicklingError):
+                        raise
+                    except Exception as ex:
+                        errors.append((items[index].get("name"), str(ex)))
+                    pending.remove(index)
+                    if progress:
+                        progress(len(paths) + len(errors), len(items))
+        except (BrokenProcessPool, pickle.PicklingError, OSError, NotImplementedError):
+            if not use_processes:
+                raise
+            use_processes = False
+    return paths, errors
+
+
+# --- 拼图导出：多条记录的小拟合图排成网格，按行切成条带并行渲染后拼接 ---
+CONTACT_CELL_WIDTH = 360
+CONTACT_CELL_HEIGHT = 240
+CONTACT_SHEET_COLUMNS = 8
+CONTACT_SHEET_BG = "#f7f9fc"
+
+
+def _contact_cell_items(data, x0, y0):
+    items = [
+        _scene_rect(x0 + 4, y0 + 4, CONTACT_CELL_WIDTH - 8, CONTACT_CELL_HEIGHT - 8, fill="#ffffff", stroke="#d9e2ec"),
+        _scene_text(x0 + 14, y0 + 12, (data.get("name") or "TLM")[:28], 16, "#111827", bold=True),
+    ]
+    chart_x, chart_y, chart_w, chart_h = x0 + 14, y0 + 44, 190, 176
+    line_x, line_y, y_min, y_max = _chart_ranges(data["d_list"], data["r_list"], data["slope"], data["intercept"])
     x_min, x_max = line_x
 
     def map_x(value):
-        return chart_x + (float(value) - x_min) / (x_max - x_min) * chart_w
+        return chart_x + (value - x_min) / (x_max - x_min) * chart_w
 
     def map_y(value):
-        return chart_y + chart_h - (float(value) - y_min) / (y_max - y_min) * chart_h
+        return chart_y + chart_h - (value - y_min) / (y_max - y_min) * chart_h
 
-    draw.line((map_x(line_x[0]), map_y(line_y[0]), map_x(line_x[1]), map_y(line_y[1])), fill="#2196f3", width=9)
-    for d, r in zip(d_list, r_list):
-        x, y = map_x(d), map_y(r)
-        draw.ellipse((x - 15, y - 15, x + 15, y + 15), fill="#f44336", outline="#b91c1c")
-    draw.text((chart_x + 150, chart_y + chart_h + 26), "Spacing d (um)", fill="#425466", font=text_font)
-    draw.text((chart_x + 18, chart_y + 18), "R (ohm)", fill="#425466", font=text_font)
+    items.extend([
+        _scene_line(chart_x, chart_y, chart_x, chart_y + chart_h, "#334155", 1),
+        _scene_line(chart_x, chart_y + chart_h, chart_x + chart_w, chart_y + chart_h, "#334155", 1),
+        _scene_line(map_x(line_x[0]), map_y(line_y[0]), map_x(line_x[1]), map_y(line_y[1]), "#2196f3", 2),
+    ])
+    for d, r in zip(data["d_list"], data["r_list"]):
+        items.append(_scene_circle(map_x(d), map_y(r), 3, "#f44336"))
 
-    info_x, info_y = 760, 198
-    draw.text((info_x, info_y), "Results", fill="#111827", font=title_font)
     metrics = [
-        ("R2", f"{data['r2']:.5f}"),
-        ("Rsh", f"{data['Rsh']:.2f} ohm/sq"),
-        ("Rc", f"{data['Rc_norm']:.4f} ohm.mm"),
-        ("LT", f"{data['LT']:.4f} um"),
-        ("rho", f"{data['rho_c']:.2E} ohm.cm2"),
+        ("R²", f"{data['r2']:.5f}"),
+        ("Rsh", f"{data['Rsh']:.1f}"),
+        ("Rc", f"{data['Rc_norm']:.3f}"),
+        ("LT", f"{data['LT']:.3f}"),
+        ("ρc", f"{data['rho_c']:.2e}"),
     ]
     for index, (label, value) in enumerate(metrics):
-        y = info_y + 92 + index * 58
-        draw.text((info_x, y), label, fill="#5b677a", font=label_font)
-        draw.text((info_x + 110, y - 8), value, fill="#1565c0", font=metric_font)
-
-    table_x, table_y, table_w, row_h = 80, 730, 1320, 52
-    draw.rectangle((table_x, table_y, table_x + table_w, table_y + row_h * 3), fill="white", outline="#334155", width=3)
-    draw.rectangle((table_x, table_y, table_x + table_w, table_y + row_h), fill="#eef3f8")
-    for row_index in range(1, 3):
-        y = table_y + row_index * row_h
-        draw.line((table_x, y, table_x + table_w, y), fill="#334155", width=2)
-    draw.text((table_x + 34, table_y + 10), "Inputs", fill="#111827", font=label_font)
-    draw.text((table_x + 34, table_y + row_h + 10), f"D (um): {', '.join(_format_number(d) for d in d_list)}", fill="#111827", font=text_font)
-    draw.text((table_x + 34, table_y + row_h * 2 + 10), f"I (mA): {', '.join(f'{i:g}' for i in currents)}", fill="#111827", font=text_font)
-
-    image.save(path, format="PNG", optimize=True)
+        y = y0 + 50 + index * 34
+        items.append(_scene_text(x0 + 220, y, label, 11, "#52616f", bold=True))
+        items.append(_scene_text(x0 + 220, y + 14, value, 14, "#0b63ce"))
+    return items
+
+
+def _render_contact_band(cells, columns):
+    # 渲染一行格子，返回原始 RGB 数据；各行的数据首尾相接就是整张图
+    width, height = columns * CONTACT_CELL_WIDTH, CONTACT_CELL_HEIGHT
+    items = []
+    for column, data in enumerate(cells):
+        items.extend(_contact_cell_items(data, column * CONTACT_CELL_WIDTH, 0))
+    try:
+        from PIL import Image, ImageDraw
+
+        image = Image.new("RGB", (width, height), CONTACT_SHEET_BG)
+        _pillow_draw(ImageDraw.Draw(image), items, 1)
+        return image.tobytes()
+    except ImportError:
+        buf = bytearray(_rgb(CONTACT_SHEET_BG) * (width * height))
+        _basic_draw(buf, width, height, items, 1)
+        return bytes(buf)
+
+
+def generate_contact_sheet(items, output_dir=None, columns=CONTACT_SHEET_COLUMNS, progress=None):
+    items = list(items)
+    if not items:
+        raise ValueError("没有可导出的记录")
+    columns = max(1, min(columns, len(items)))
+    rows = [items[start:start + columns] for start in range(0, len(items), columns)]
+    bands = [None] * len(rows)
+    pending = list(range(len(rows)))
+    workers = min(_batch_worker_count(), len(rows))
+    use_processes = not is_android_runtime() and workers > 1
+
+    while pending:
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        try:
+            with executor_cls(max_workers=workers) as executor:
+                futures = {executor.submit(_render_contact_band, rows[index], columns): index for index in pending}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    bands[index] = future.result()
+                    pending.remove(index)
+                    if progress:
+                        progress(len(rows) - len(pending), len(rows))
+        except (BrokenProcessPool, pickle.PicklingError, OSError, NotImplementedError):
+            if not use_processes:
+                raise
+            use_processes = False
+
+    width, height = columns * CONTACT_CELL_WIDTH, len(rows) * CONTACT_CELL_HEIGHT
+    raw = b"".join(bands)
+    try:
+        from PIL import Image
+
+        out = io.BytesIO()
+        Image.frombytes("RGB", (width, height), raw).save(out, format="PNG")
+        png = out.getbuffer()
+    except ImportError:
+        png = _png_bytes(width, height, raw)
+    path = reserve_export_path(output_dir or default_export_dir(), f"TLM_contact_{len(items)}_{export_stamp()}.png", png)
     return str(path)
 
 
-def generate_16x9_png(data, output_dir=None):
+# --- 历史记录缩略图：低分辨率拟合小图，按记录 id + 内容哈希缓存到磁盘 ---
+HISTORY_THUMB_WIDTH = 96
+HISTORY_THUMB_HEIGHT = 54
+HISTORY_ROW_EXTENT = 80
+
+
+def history_thumb_dir():
+    app_data = os.environ.get("FLET_APP_STORAGE_DATA")
+    base = Path(app_data) if app_data else Path(tempfile.gettempdir()) / "TLM"
+    return base / "thumbs"
+
+
+def history_thumb_path(record):
+    payload = json.dumps(
+        [record.get("w"), record.get("v"), record.get("inputs", []), record.get("preset_snapshot")],
+        sort_keys=True,
+    )
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+    return history_thumb_dir() / f"{safe_filename(str(record.get('id') or 'record'))}_{digest}.png"
+
+
+def prune_history_thumbs(records):
+    # 删掉已不在历史里的缩略图（手动删除、超出 HISTORY_LIMIT 或记录内容变了的）
+    keep = {history_thumb_path(record).name for record in records}
+    removed = 0
     try:
-        return generate_16x9_png_pillow(data, output_dir)
-    except Exception as ex:
-        if is_android_runtime():
-            raise RuntimeError(f"高清图片导出组件 Pillow 不可用，无法生成顺滑字体图片: {ex}")
-        return generate_16x9_png_basic(data, output_dir)
+        paths = list(history_thumb_dir().glob("*.png"))
+    except OSError:
+        return 0
+    for path in paths:
+        if path.name in keep:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def render_history_sparkline(record):
+    data = history_record_export_data(record)
+    return _sparkline_png(data["d_list"], data["r_list"], data["slope"], data["intercept"], HISTORY_THUMB_WIDTH, HISTORY_THUMB_HEIGHT)
+
+
+def _sparkline_png(d_list, r_list, slope, intercept, width, height):
+    buf = bytearray(b"\xff" * (width * height * 3))
+    pad = 6
+    line_x, line_y, y_min, y_max = _chart_ranges(d_list, r_list, slope, intercept)
+    x_min, x_max = line_x
+
+    def map_x(value):
+        return pad + (value - x_min) / (x_max - x_min) * (width - 2 * pad)
+
+    def map_y(value):
+        return height - pad - (value - y_min) / (y_max - y_min) * (height - 2 * pad)
+
+    _put_line(buf, width, height, pad, height - pad, width - pad, height - pad, "#cbd5e1")
+    _put_line(buf, width, height, map_x(line_x[0]), map_y(line_y[0]), map_x(line_x[1]), map_y(line_y[1]), "#2196f3", 2)
+    for d, r in zip(d_list, r_list):
+        _put_circle(buf, width, height, map_x(d), map_y(r), 2, "#f44336")
+    return _png_bytes(width, height, buf)
+
+
+# --- 设置预览：按参考测量的 Rsh、Rc 推算新间距下的 R–d 曲线 ---
+SPACING_PREVIEW_DELAY = 0.15
+PREVIEW_CURVE_WIDTH = 240
+PREVIEW_CURVE_HEIGHT = 90
+
+
+def expected_tlm_curve(spacings, width, voltage, reference):
+    # R(d) = Rsh·d/W + 2·Rc，Rc(Ω) = Rc_norm(Ω·mm) / W(mm)
+    results = reference.get("results") or {}
+    slope = float(results["Rsh"]) / width
+    intercept = 2 * float(results["Rc_norm"]) * 1000.0 / width
+    r_list = [slope * d + intercept for d in spacings]
+    return {
+        "r_list": r_list,
+        "currents": [abs(voltage / r) * 1000.0 if r else 0.0 for r in r_list],
+        "slope": slope,
+        "intercept": intercept,
+    }
+
+
+def render_expected_curve(spacings, curve):
+    return _sparkline_png(spacings, curve["r_list"], curve["slope"], curve["intercept"], PREVIEW_CURVE_WIDTH, PREVIEW_CURVE_HEIGHT)
+
+
+def load_history_thumb(record):
+    # 命中磁盘缓存直接读；否则渲染后先写临时文件再改名，避免读到半个文件
+    path = history_thumb_path(record)
+    try:
+        return path.read_bytes()
+    except OSError:
+        pass
+    png = render_history_sparkline(record)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(png)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return png
+
+
+# --- 计时时钟：单调时钟 + 启动时的墙钟锚点 ---
+# 计时只看单调时钟，手机同步 NTP 改墙钟时不会跳秒；Linux/Android 用 CLOCK_BOOTTIME，休眠期间也在走。
+# 没有 BOOTTIME 的平台在 App 恢复时重新对齐墙钟，补上休眠的时间。
+_BOOT_CLOCK_ID = getattr(time, "CLOCK_BOOTTIME", None)
+_CLOCK_ANCHOR = {}
+
+
+def _boot_clock():
+    if _BOOT_CLOCK_ID is not None:
+        try:
+            return time.clock_gettime(_BOOT_CLOCK_ID)
+        except OSError:
+            pass
+    return time.monotonic()
+
+
+def _anchor_timer_clock():
+    _CLOCK_ANCHOR["wall"] = time.time()
+    _CLOCK_ANCHOR["mono"] = _boot_clock()
+
+
+def timer_now():
+    return _CLOCK_ANCHOR["wall"] + (_boot_clock() - _CLOCK_ANCHOR["mono"])
+
+
+def resync_timer_clock():
+    # 从后台恢复：单调时钟不含休眠时重新锚定，并唤醒调度线程按新时间重算等待
+    if _BOOT_CLOCK_ID is None:
+        _anchor_timer_clock()
+    with _SCHEDULER["cond"]:
+        _SCHEDULER["cond"].notify()
+
+
+_anchor_timer_clock()
+
+
+# --- 计时调度：所有计时器共用一个线程和一个截止时间堆，只在显示的秒数变化时唤醒 ---
+# jobs: key -> 堆里有效条目的序号；latest: key -> 最近一次调度或取消的序号，回调期间有人改动就不再续约
+_SCHEDULER = {"heap": [], "jobs": {}, "latest": {}, "cond": threading.Condition(), "thread": None}
+_SCHEDULER_SEQ = itertools.count()
+SCHEDULER_RETRY_DELAY = 1.0
+
+
+def schedule_timer(key, deadline, callback):
+    # 同一个 key 重新调度时旧条目留在堆里，出堆时按序号判断作废（惰性删除）
+    with _SCHEDULER["cond"]:
+        seq = next(_SCHEDULER_SEQ)
+        _SCHEDULER["jobs"][key] = seq
+        _SCHEDULER["latest"][key] = seq
+        heapq.heappush(_SCHEDULER["heap"], (deadline, seq, key, callback))
+        thread = _SCHEDULER["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_scheduler_loop, daemon=True)
+            _SCHEDULER["thread"] = thread
+            thread.start()
+        _SCHEDULER["cond"].notify()
+
+
+def cancel_timer(key):
+    with _SCHEDULER["cond"]:
+        _SCHEDULER["jobs"].pop(key, None)
+        _SCHEDULER["latest"][key] = next(_SCHEDULER_SEQ)
+        _SCHEDULER["cond"].notify()
+
+
+def _scheduler_loop():
+    heap, jobs, latest, cond = _SCHEDULER["heap"], _SCHEDULER["jobs"], _SCHEDULER["latest"], _SCHEDULER["cond"]
+    while True:
+        with cond:
+            while True:
+                while heap and jobs.get(heap[0][2]) != heap[0][1]:
+                    heapq.heappop(heap)
+                if not heap:
+                    cond.wait()
+                    continue
+                delay = heap[0][0] - timer_now()
+                if delay <= 0:
+                    _, seq, key, callback = heapq.heappop(heap)
+                    del jobs[key]
+                    break
+                cond.wait(delay)
+        # 回调返回下一次截止时间则继续调度；期间若已被重新调度或取消就不再覆盖。
+        # 回调出错时打印堆栈并稍后重试，避免这个计时从此静默停掉
+        try:
+            next_deadline = callback()
+        except Exception:
+            traceback.print_exc()
+            next_deadline = timer_now() + SCHEDULER_RETRY_DELAY
+        if next_deadline is not None:
+            with cond:
+                if latest.get(key) == seq:
+                    seq = next(_SCHEDULER_SEQ)
+                    jobs[key] = seq
+                    latest[key] = seq
+                    heapq.heappush(heap, (next_deadline, seq, key, callback))
+
+
+# --- 计时状态日志：只追加变化字段，定期压缩成快照 ---
+TIMER_JOURNAL_DELAY = 0.3
+TIMER_JOURNAL_COMPACT_EVERY = 64
+
+
+def timer_journal_path():
+    app_data = os.environ.get("FLET_APP_STORAGE_DATA")
+    base = Path(app_data) if app_data else Path(tempfile.gettempdir()) / "TLM"
+    return base / "timer_journal.jsonl"
+
+
+def append_journal(path, patch):
+    # 一行一个 JSON 补丁，写完立即 fsync；崩溃最多丢掉最后一行没写完的内容
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(patch, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_journal(path):
+    patches = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    patch = json.loads(line)
+                except ValueError:
+                    break
+                if isinstance(patch, dict):
+                    patches.append(patch)
+    except OSError:
+        pass
+    return patches
+
+
+def truncate_journal(path):
+    try:
+        with open(path, "w", encoding="utf-8"):
+            pass
+    except OSError:
+        pass
 
 
 def main(page):
@@ -623,11 +1709,57 @@ def main(page):
     page.padding = 16
     page.bgcolor = "#f4f7fb"
 
+    # 当前显示的页面；计时器只在自己的页面可见时才把控件推送到客户端
+    view_state = {"current": None}
+
+    # --- 局部刷新：只推送改过的控件，同一轮事件循环里的多次改动合并成一次 update ---
+    update_queue = {"controls": {}, "scheduled": False, "lock": threading.Lock()}
+
+    def flush_updates():
+        with update_queue["lock"]:
+            queued = list(update_queue["controls"].values())
+            update_queue["controls"].clear()
+            update_queue["scheduled"] = False
+        # 还没挂到页面上的控件（uid 为空）先跳过，改动会随它第一次显示一起发出去
+        controls = [
+            control for control, view in queued
+            if getattr(control, "uid", None) and (view is None or view == view_state["current"])
+        ]
+        if not controls:
+            return
+        try:
+            page.update(*controls)
+        except Exception:
+            pass
+
+    def queue_update(*controls, view=None):
+        with update_queue["lock"]:
+            for control in controls:
+                update_queue["controls"][id(control)] = (control, view)
+            if update_queue["scheduled"]:
+                return
+            update_queue["scheduled"] = True
+        loop = getattr(page, "loop", None)
+        try:
+            loop.call_soon_threadsafe(flush_updates)
+        except Exception:
+            flush_updates()
+
+    snack_state = {"control": None}
+
     def show_message(text, color="#1f77b4"):
+        # 复用同一个 SnackBar，避免每条提示都往 overlay 里追加一个控件
+        snack = snack_state["control"]
+        if snack is None:
+            snack = ft.SnackBar(ft.Text(text), bgcolor=color)
+            snack_state["control"] = snack
+        else:
+            snack.content.value = text
+            snack.bgcolor = color
         try:
-            page.open(ft.SnackBar(ft.Text(text), bgcolor=color))
+            page.open(snack)
         except Exception:
-            page.snack_bar = ft.SnackBar(ft.Text(text), bgcolor=color)
+            page.snack_bar = snack
             page.snack_bar.open = True
             page.update()
 
@@ -743,8 +1875,14 @@ def main(page):
     summary_text = ft.Text(size=13, color="#52616f")
     input_refs = []
     input_col = ft.Column(spacing=8)
+    # 电流输入框池：切换预设时只改标签、值和可见性，多出来的隐藏留着下次用
+    input_pool = input_col.controls
     result_text = ft.Text("选择预设并输入电流后点击计算", size=15, color="#6b7280")
 
+    export_profile_dropdown = ft.Dropdown(label="导出尺寸", bgcolor="white", expand=True)
+    export_progress = ft.ProgressBar(visible=False, color="#2196f3", bgcolor="#e3ecf7")
+    export_jobs = {"count": 0}
+
     chart = ft.LineChart(
         data_series=[],
         left_axis=ft.ChartAxis(title=ft.Text("总电阻 (Ω)"), labels_size=32),
@@ -753,28 +1891,45 @@ def main(page):
         expand=True,
         height=320,
     )
+    # 两条曲线常驻，重新计算时只改点坐标，update 时客户端只收到变了的 x/y
+    measured_series = ft.LineChartData(data_points=[], color="red", stroke_width=0, point=True)
+    fit_series = ft.LineChartData(data_points=[], color="blue", stroke_width=3)
+
+    def set_series_points(series, points):
+        data_points = series.data_points
+        for index, (x, y) in enumerate(points):
+            if index < len(data_points):
+                point = data_points[index]
+                if point.x != x:
+                    point.x = x
+                if point.y != y:
+                    point.y = y
+            else:
+                data_points.append(ft.LineChartDataPoint(x=x, y=y))
+        del data_points[len(points):]
 
-    pending_save_as = {"path": None}
+    pending_save_as = {"bytes": None}
     save_file_picker_state = {"control": None}
 
     def on_save_file_result(e):
         target = getattr(e, "path", None)
         if not target:
-            pending_save_as["path"] = None
+            pending_save_as["bytes"] = None
             return
         try:
-            source = pending_save_as.get("path")
-            if source:
+            payload = pending_save_as.get("bytes")
+            if payload is not None:
                 target = normalize_android_save_path(target)
                 if not target:
                     raise RuntimeError("Android 文件选择器返回的是文档 URI，无法直接写入。请使用保存到相册按钮。")
                 Path(target).parent.mkdir(parents=True, exist_ok=True)
-                shutil.copyfile(source, target)
+                with open(target, "wb") as f:
+                    f.write(payload)
                 show_message(f"已导出: {target}", "green")
         except Exception as ex:
             show_message(f"导出失败: {ex}", "red")
         finally:
-            pending_save_as["path"] = None
+            pending_save_as["bytes"] = None
 
     def get_save_file_picker():
         if save_file_picker_state["control"] is None:
@@ -788,25 +1943,33 @@ def main(page):
                 pass
         return save_file_picker_state["control"]
 
-    export_state = {"capture": None, "dialog": None}
+    export_state = {"capture": None, "host": None, "image": None, "waiter": None}
+
+    def on_export_canvas_resize(e):
+        # 只认本次导出对应宽度的 on_resize，迟到的上一次回调不会提前放行截图
+        waiter = export_state["waiter"]
+        width = getattr(e, "width", None)
+        if waiter and (width is None or abs(float(width) - waiter[2]) < 0.5):
+            waiter[0].call_soon_threadsafe(waiter[1].set)
 
-    def get_export_capture_dialog():
+    def get_export_capture():
         if not hasattr(ft, "Screenshot"):
-            return None, None
+            return None
         if export_state["capture"] is None:
+            # 截图控件常驻 overlay，放在屏幕外，连续导出不再弹出对话框
             capture = ft.Screenshot()
-            dialog = ft.AlertDialog(
-                modal=True,
-                title=ft.Text("正在生成导出图"),
-                content=ft.Container(
-                    content=capture,
-                    width=960,
-                    height=540,
-                ),
+            host = ft.Container(
+                content=capture,
+                width=FLET_EXPORT_WIDTH,
+                height=FLET_EXPORT_HEIGHT,
+                left=-FLET_EXPORT_WIDTH * 2,
+                top=0,
             )
             export_state["capture"] = capture
-            export_state["dialog"] = dialog
-        return export_state["capture"], export_state["dialog"]
+            export_state["host"] = host
+            page.overlay.append(host)
+            page.update()
+        return export_state["capture"]
 
     share_service = None
     if hasattr(ft, "Share"):
@@ -815,6 +1978,13 @@ def main(page):
         except Exception:
             share_service = None
 
+    def refresh_export_profile_dropdown():
+        # 分享专用的有损档位只给分享按钮用，不出现在导出尺寸里
+        export_profile_dropdown.options = [
+            option(key, spec["label"]) for key, spec in EXPORT_PROFILES.items() if key != SHARE_EXPORT_PROFILE
+        ]
+        export_profile_dropdown.value = export_profile_dropdown.value or DEFAULT_EXPORT_PROFILE
+
     def refresh_preset_dropdown():
         preset_dropdown.options = [option(p["id"], p["name"]) for p in presets_state["items"]]
         preset_dropdown.value = app_state["active_preset"]["id"]
@@ -832,6 +2002,7 @@ def main(page):
         refresh_preset_dropdown()
         update_summary()
         rebuild_current_inputs(clear_inputs=clear_inputs)
+        queue_update(preset_dropdown, summary_text, input_col, view="tlm")
 
     def rebuild_current_inputs(clear_inputs=True):
         existing_values = {}
@@ -839,21 +2010,34 @@ def main(page):
             for spacing, field in input_refs:
                 existing_values[float(spacing)] = field.value
 
-        input_refs.clear()
-        input_col.controls.clear()
-
-        for spacing in app_state["active_preset"]["spacings"]:
-            field = ft.TextField(
-                label=f"d = {_format_number(spacing)} μm",
-                suffix_text="mA",
-                keyboard_type="number",
-                bgcolor="white",
-                height=52,
+        spacings = [float(spacing) for spacing in app_state["active_preset"]["spacings"]]
+        while len(input_pool) < len(spacings):
+            input_pool.append(
+                ft.TextField(
+                    suffix_text="mA",
+                    keyboard_type="number",
+                    bgcolor="white",
+                    height=52,
+                )
             )
-            if not clear_inputs and float(spacing) in existing_values:
-                field.value = existing_values[float(spacing)]
-            input_refs.append((float(spacing), field))
-            input_col.controls.append(field)
+
+        input_refs.clear()
+        for index, field in enumerate(input_pool):
+            if index < len(spacings):
+                spacing = spacings[index]
+                label = f"d = {_format_number(spacing)} μm"
+                value = existing_values.get(spacing, "")
+                visible = True
+                input_refs.append((spacing, field))
+            else:
+                label, value, visible = field.label, "", False
+            # 只在真的变了时赋值，update 时客户端只收到这几个属性
+            if field.label != label:
+                field.label = label
+            if (field.value or "") != (value or ""):
+                field.value = value
+            if field.visible != visible:
+                field.visible = visible
 
     def get_current_input_pairs():
         d_list = []
@@ -875,26 +2059,18 @@ def main(page):
             w_val = float(preset["width"])
             v_val = float(preset["voltage"])
             d_list, currents, inputs_data = get_current_input_pairs()
-            r_list = []
-
-            for current in currents:
-                r_calc = abs(v_val / (current / 1000.0))
-                r_list.append(r_calc)
+            results = calculate_tlm(w_val, v_val, d_list, currents)
+            r_list = results["r_list"]
 
             if len(d_list) < 2:
                 if update_ui:
                     result_text.value = "错误: 至少需要 2 个电流数据点"
                     result_text.color = "red"
-                    page.update()
+                    queue_update(result_text, view="tlm")
                 return None
 
-            slope, intercept, r2 = simple_linear_fit(d_list, r_list)
-
-            Rc_ohms = intercept / 2
-            Rc_norm = Rc_ohms * (w_val / 1000.0)
-            Rsh = slope * w_val
-            LT = Rc_ohms * w_val / Rsh if Rsh != 0 else 0
-            rho_c = Rc_ohms * LT * w_val * 1e-8
+            slope, intercept, r2 = results["slope"], results["intercept"], results["r2"]
+            Rc_norm, Rsh, LT, rho_c = results["Rc_norm"], results["Rsh"], results["LT"], results["rho_c"]
 
             if update_ui:
                 d_min = min(d_list)
@@ -911,25 +2087,10 @@ def main(page):
 
                 chart.min_y = y_min * 0.8 if y_min > 0 else y_min * 1.2
                 chart.max_y = y_max * 1.1 if y_max > 0 else y_max * 0.8
-                chart.data_series = [
-                    ft.LineChartData(
-                        data_points=[
-                            ft.LineChartDataPoint(x=d, y=r)
-                            for d, r in zip(d_list, r_list)
-                        ],
-                        color="red",
-                        stroke_width=0,
-                        point=True,
-                    ),
-                    ft.LineChartData(
-                        data_points=[
-                            ft.LineChartDataPoint(x=d_min, y=slope * d_min + intercept),
-                            ft.LineChartDataPoint(x=d_max, y=slope * d_max + intercept),
-                        ],
-                        color="blue",
-                        stroke_width=3,
-                    ),
-                ]
+                set_series_points(measured_series, list(zip(d_list, r_list)))
+                set_series_points(fit_series, [(d_min, slope * d_min + intercept), (d_max, slope * d_max + intercept)])
+                if not chart.data_series:
+                    chart.data_series = [measured_series, fit_series]
 
                 result_text.value = (
                     f"拟合优度 R²: {r2:.5f}\n"
@@ -939,7 +2100,7 @@ def main(page):
                     f"比接触电阻率 ρc: {rho_c:.2e} Ω·cm²"
                 )
                 result_text.color = "blue"
-                page.update()
+                queue_update(chart, result_text, view="tlm")
 
             record_name = (name_input.value or "").strip() or time.strftime("TLM_%Y%m%d_%H%M%S")
             return {
@@ -952,27 +2113,19 @@ def main(page):
                 "inputs": inputs_data,
                 "d_list": d_list,
                 "currents": currents,
-                "r_list": r_list,
-                "slope": slope,
-                "intercept": intercept,
-                "r2": r2,
-                "Rc_ohms": Rc_ohms,
-                "Rc_norm": Rc_norm,
-                "Rsh": Rsh,
-                "LT": LT,
-                "rho_c": rho_c,
+                **results,
             }
         except ZeroDivisionError:
             if update_ui:
                 result_text.value = "计算错误: 电流不能为 0"
                 result_text.color = "red"
-                page.update()
+                queue_update(result_text, view="tlm")
             return None
         except Exception as ex:
             if update_ui:
                 result_text.value = f"计算错误: {ex}"
                 result_text.color = "red"
-                page.update()
+                queue_update(result_text, view="tlm")
             return None
 
     def on_preset_change(e):
@@ -995,188 +2148,125 @@ def main(page):
         if data and save_to_history(data):
             show_message(f"已保存记录: {data['name']}", "green")
 
-    def export_table_row(left, right, header=False):
-        bg = "#eef3f8" if header else "white"
-        weight = "bold" if header else None
-        return ft.Row(
-            controls=[
-                ft.Container(
-                    content=ft.Text(left, size=14 if header else 13, weight=weight),
-                    width=420,
-                    height=24,
-                    bgcolor=bg,
-                    alignment=ft.alignment.center,
-                    border=ft.border.all(1, "#334155"),
-                ),
-                ft.Container(
-                    content=ft.Text(right, size=14 if header else 13, weight=weight),
-                    width=420,
-                    height=24,
-                    bgcolor=bg,
-                    alignment=ft.alignment.center,
-                    border=ft.border.all(1, "#334155"),
-                ),
-            ],
-            spacing=0,
-        )
-
-    def build_flet_export_image(data):
-        d_list = data["d_list"]
-        r_list = data["r_list"]
-        slope = data["slope"]
-        intercept = data["intercept"]
-        x_min = min(d_list)
-        x_max = max(d_list)
-        x_pad = max((x_max - x_min) * 0.08, 0.5)
-        line_x = [x_min - x_pad, x_max + x_pad]
-        line_y = [slope * x + intercept for x in line_x]
-
-        y_values = r_list + line_y
-        y_min = min(y_values)
-        y_max = max(y_values)
-        y_pad = max((y_max - y_min) * 0.12, 1)
-        chart_min_y = y_min - y_pad
-        chart_max_y = y_max + y_pad
-
-        export_chart = ft.LineChart(
-            data_series=[
-                ft.LineChartData(
-                    data_points=[
-                        ft.LineChartDataPoint(x=d, y=r)
-                        for d, r in zip(d_list, r_list)
-                    ],
-                    color="red",
-                    stroke_width=0,
-                    point=True,
-                ),
-                ft.LineChartData(
-                    data_points=[
-                        ft.LineChartDataPoint(x=line_x[0], y=line_y[0]),
-                        ft.LineChartDataPoint(x=line_x[1], y=line_y[1]),
-                    ],
-                    color="blue",
-                    stroke_width=3,
-                ),
-            ],
-            left_axis=ft.ChartAxis(title=ft.Text("总电阻 R (Ω)"), labels_size=36),
-            bottom_axis=ft.ChartAxis(title=ft.Text("间距 d (μm)"), labels_size=24),
-            min_y=chart_min_y,
-            max_y=chart_max_y,
-            min_x=line_x[0],
-            max_x=line_x[1],
-            width=320,
-            height=320,
-        )
-
-        table_rows = [export_table_row("间距 d (μm)", "电流 I (mA)", header=True)]
-        table_rows.extend(
-            export_table_row(_format_number(d), f"{current:g}")
-            for d, current in zip(data["d_list"], data["currents"])
-        )
-
-        export_time = time.strftime("%Y-%m-%d %H:%M:%S")
-        return ft.Container(
-            width=960,
-            height=540,
-            bgcolor="#f7f9fc",
-            padding=ft.padding.only(left=48, right=48, top=20, bottom=18),
-            content=ft.Column(
-                controls=[
-                    ft.Text(data.get("name") or "TLM Analysis", size=25, weight="bold", color="#111827"),
-                    ft.Text(
-                        f"预设: {data.get('preset_name', '-')}    "
-                        f"W={data['w']:.4g} μm    V={data['v']:.4g} V    "
-                        f"导出时间: {export_time}",
-                        size=13,
-                        color="#425466",
-                    ),
-                    ft.Container(height=14),
-                    ft.Row(
-                        controls=[
-                            ft.Container(
-                                content=export_chart,
-                                width=320,
-                                height=320,
-                                bgcolor="white",
-                                border=ft.border.all(1, "#cbd5e1"),
-                            ),
-                            ft.Container(width=86),
-                            ft.Container(
-                                content=ft.Column(
-                                    controls=[
-                                        ft.Text("结果", size=22, weight="bold"),
-                                        ft.Text("Rc", size=13, color="#5b677a"),
-                                        ft.Text(f"{data['Rc_norm']:.4f} Ω·mm", size=20, weight="bold", color="#111827"),
-                                        ft.Text("Rsh", size=13, color="#5b677a"),
-                                        ft.Text(f"{data['Rsh']:.2f} Ω/□", size=20, weight="bold", color="#111827"),
-                                        ft.Text("R²", size=13, color="#5b677a"),
-                                        ft.Text(f"{data['r2']:.5f}", size=20, weight="bold", color="#111827"),
-                                    ],
-                                    spacing=8,
-                                ),
-                                width=300,
-                                height=300,
-                                padding=ft.padding.only(top=40),
-                            ),
-                        ],
-                        spacing=0,
-                    ),
-                    ft.Container(height=14),
-                    ft.Column(controls=table_rows, spacing=0),
-                ],
-                spacing=0,
-            ),
-        )
-
-    async def generate_16x9_png_with_flet(data):
-        export_capture, export_preview_dialog = get_export_capture_dialog()
+    async def render_16x9_png_with_flet(data, profile=None, scene=None):
+        export_capture = get_export_capture()
         if not export_capture:
             raise RuntimeError("当前 Flet 版本不支持 Screenshot")
 
-        output_dir = default_export_dir()
-        output_dir.mkdir(parents=True, exist_ok=True)
-        stamp = time.strftime("%Y%m%d_%H%M%S")
-        path = output_dir / f"{safe_filename(data.get('name'))}_{stamp}_16x9.png"
+        profile = get_export_profile(profile)
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        scene = scene or build_export_scene(data)
+        image = export_state["image"]
+        if image is None:
+            image = build_flet_export_image(scene, on_export_canvas_resize)
+            export_state["image"] = image
+            export_capture.content = image
+        export_state["waiter"] = (loop, ready, set_flet_export_scene(image, scene))
+        page.update(export_state["host"])
+        deadline = loop.time() + FLET_CAPTURE_TIMEOUT
+        try:
+            await asyncio.wait_for(ready.wait(), FLET_CAPTURE_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
 
-        export_capture.content = build_flet_export_image(data)
+        # 旧版客户端可能不回传 on_resize，超时后仍然尝试截图，失败就短暂重试到截止时间
+        while True:
+            try:
+                capture_result = export_capture.capture(pixel_ratio=profile["width"] / FLET_EXPORT_WIDTH)
+                if hasattr(capture_result, "__await__"):
+                    capture_result = await capture_result
+                if isinstance(capture_result, str):
+                    if "," in capture_result:
+                        capture_result = capture_result.split(",", 1)[1]
+                    image_bytes = base64.b64decode(capture_result)
+                else:
+                    image_bytes = memoryview(capture_result or b"")
+                if image_bytes:
+                    break
+            except Exception:
+                if loop.time() >= deadline:
+                    raise
+            if loop.time() >= deadline:
+                raise RuntimeError("截图超时")
+            await asyncio.sleep(FLET_CAPTURE_RETRY)
+        return image_bytes
+
+    def set_export_busy(active):
+        export_jobs["count"] = max(0, export_jobs["count"] + (1 if active else -1))
+        export_progress.visible = export_jobs["count"] > 0
+        queue_update(export_progress, view="tlm")
+
+    async def run_export_job(fn, *args):
+        # 渲染放到线程里跑，事件循环照常处理计时器刷新和其他按钮
+        set_export_busy(True)
         try:
-            page.open(export_preview_dialog)
-            page.update()
-            await asyncio.sleep(0.25)
-            capture_result = export_capture.capture(pixel_ratio=2)
-            if hasattr(capture_result, "__await__"):
-                capture_result = await capture_result
-            if isinstance(capture_result, str):
-                if "," in capture_result:
-                    capture_result = capture_result.split(",", 1)[1]
-                image_bytes = base64.b64decode(capture_result)
-            else:
-                image_bytes = bytes(capture_result)
-            path.write_bytes(image_bytes)
-            return str(path)
+            return await asyncio.to_thread(fn, *args)
         finally:
+            set_export_busy(False)
+
+    async def render_current_png(profile=None):
+        # 返回 (data, profile, 缓存条目)；缓存条目里至少有图片数据或已落盘的路径
+        data = perform_calculation(update_ui=True)
+        if not data:
+            return None, None, None
+        profile = get_export_profile(profile or export_profile_dropdown.value)
+        # 没填名称时名称是按秒生成的时间戳，不参与缓存键，否则每秒都会失配
+        cache_key = export_cache_key(
+            {**data, "name": (name_input.value or "").strip()}, profile
+        )
+        entry = export_cache_get(cache_key)
+        if entry:
+            return data, profile, {**entry, "key": cache_key}
+        png = None
+        if export_format(profile) != "png":
+            # 刚保存过同一份数据时，分享图由已有的 PNG 转码得到，不再重新渲染
+            source = export_cache_find_png(cache_key[0], profile["width"])
+            if source:
+                try:
+                    png = await run_export_job(transcode_export_image, source, profile)
+                except Exception:
+                    png = None
+        scene = build_export_scene(data) if png is None else None
+        # Flet 截图只能得到 PNG；WebP/JPEG 等有损格式直接在工作线程里用 Pillow 编码
+        if png is None and export_format(profile) == "png":
+            set_export_busy(True)
             try:
-                page.close(export_preview_dialog)
+                png = await render_16x9_png_with_flet(data, profile, scene)
             except Exception:
                 pass
-
-    async def export_current_png():
-        data = perform_calculation(update_ui=True)
-        if not data:
-            return None
-        try:
-            path = await generate_16x9_png_with_flet(data)
-            app_state["last_export_path"] = path
-            return path
-        except Exception:
-            pass
-        try:
-            path = generate_16x9_png(data, default_export_dir())
-            app_state["last_export_path"] = path
-            return path
-        except Exception as ex:
-            show_message(f"生成图片失败: {ex}", "red")
+            finally:
+                set_export_busy(False)
+        if png is None:
+            try:
+                png = await run_export_job(render_16x9_png, data, profile, scene)
+            except Exception as ex:
+                show_message(f"生成图片失败: {ex}", "red")
+                return None, None, None
+        export_cache_put(cache_key, payload=png)
+        return data, profile, {"path": None, "bytes": png, "key": cache_key}
+
+    async def export_current_png(profile=None):
+        data, profile, entry = await render_current_png(profile)
+        if not entry:
             return None
+        path = entry["path"]
+        if not path:
+            file_name = export_file_name(data, profile, payload=entry["bytes"])
+
+            def write_export():
+                # 目录探测（恢复后或写失败后要重新探测）也放在工作线程里，不占事件循环
+                return reserve_export_path(default_export_dir(), file_name, entry["bytes"])
+
+            try:
+                path = str(await asyncio.to_thread(write_export))
+            except Exception as ex:
+                show_message(f"保存图片失败: {ex}", "red")
+                return None
+            export_cache_put(entry["key"], path)
+        app_state["last_export_path"] = path
+        return path
 
     async def on_save_album_click(e):
         path = await export_current_png()
@@ -1184,45 +2274,61 @@ def main(page):
             show_message(f"已生成 16:9 图片: {path}", "green")
 
     async def on_save_as_click(e):
-        path = await export_current_png()
-        if not path:
-            return
         if os.name != "nt":
-            show_message(f"已保存到 1aTLM: {path}", "green")
+            path = await export_current_png()
+            if path:
+                show_message(f"已保存到 1aTLM: {path}", "green")
             return
-        file_name = Path(path).name
-        pending_save_as["path"] = path
+        data, profile, entry = await render_current_png()
+        if not entry:
+            return
+        src_bytes = entry["bytes"]
+        if src_bytes is None:
+            # 只有磁盘上的旧导出（内存里的数据已被淘汰）时才读一次文件
+            src_bytes = await asyncio.to_thread(Path(entry["path"]).read_bytes)
+        file_name = export_file_name(data, profile, payload=src_bytes)
+        pending_save_as["bytes"] = src_bytes
         save_file_picker = get_save_file_picker()
         try:
-            with open(path, "rb") as f:
-                src_bytes = f.read()
             result = save_file_picker.save_file(
                 dialog_title="导出 TLM 图片",
                 file_name=file_name,
-                allowed_extensions=["png"],
-                src_bytes=src_bytes,
+                allowed_extensions=[Path(file_name).suffix.lstrip(".")],
+                src_bytes=bytes(src_bytes),
             )
             if hasattr(result, "__await__"):
                 saved_path = await result
                 if saved_path:
                     show_message(f"已导出: {saved_path}", "green")
-                    pending_save_as["path"] = None
+                    pending_save_as["bytes"] = None
         except TypeError:
+            # 旧版 FilePicker 没有 src_bytes，等 on_result 拿到目标路径后直接写入
             try:
                 save_file_picker.save_file(
                     dialog_title="导出 TLM 图片",
                     file_name=file_name,
-                    allowed_extensions=["png"],
+                    allowed_extensions=[Path(file_name).suffix.lstrip(".")],
                 )
             except Exception as ex:
                 show_message(f"导出失败: {ex}", "red")
-                pending_save_as["path"] = None
+                pending_save_as["bytes"] = None
         except Exception as ex:
             show_message(f"导出失败: {ex}", "red")
-            pending_save_as["path"] = None
+            pending_save_as["bytes"] = None
+
+    async def on_save_svg_click(e):
+        data = perform_calculation(update_ui=True)
+        if not data:
+            return
+        try:
+            path = await run_export_job(generate_16x9_svg, data, None, export_profile_dropdown.value)
+            app_state["last_export_path"] = path
+            show_message(f"已生成 SVG 矢量图: {path}", "green")
+        except Exception as ex:
+            show_message(f"生成 SVG 失败: {ex}", "red")
 
     async def on_share_click(e):
-        path = await export_current_png()
+        path = await export_current_png(SHARE_EXPORT_PROFILE)
         if not path:
             return
         show_message(f"当前 Flet 版本没有系统分享接口。图片已保存，请从文件管理或相册分享: {path}", "#f59e0b")
@@ -1236,6 +2342,15 @@ def main(page):
     tlm_count_input = ft.TextField(label="TLM 数量", keyboard_type="number", bgcolor="white")
     spacing_values_input = ft.TextField(label="间距列表", suffix_text="μm", bgcolor="white")
     spacing_preview = ft.Text(size=12, color="#52616f")
+    spacing_curve_text = ft.Text(size=12, color="#52616f", visible=False)
+    spacing_curve_image = ft.Image(
+        src_base64="",
+        width=PREVIEW_CURVE_WIDTH,
+        height=PREVIEW_CURVE_HEIGHT,
+        visible=False,
+    )
+    # generation 每次输入都递增，后台算完的曲线若已过期就直接丢弃
+    preview_state = {"generation": 0, "executor": None}
 
     def dialog_width(default_width):
         page_width = page.width or default_width + 80
@@ -1254,25 +2369,83 @@ def main(page):
         tlm_count_input.value = str(preset["tlm_count"])
         spacing_values_input.value = spacings_to_text(preset["spacings"])
         update_spacing_preview()
+        queue_update(
+            settings_preset_dropdown,
+            preset_name_input,
+            width_input,
+            voltage_input,
+            tlm_count_input,
+            spacing_values_input,
+        )
 
     def refresh_settings_dropdown():
         settings_preset_dropdown.options = [option(p["id"], p["name"]) for p in presets_state["items"]]
 
     def update_spacing_preview(e=None):
+        cancel_timer("spacing_preview")
+        preview_state["generation"] += 1
         try:
             spacings = build_spacings(spacing_values_input.value, tlm_count_input.value)
             spacing_preview.value = f"当前间距: {spacings_to_text(spacings)} μm"
             spacing_preview.color = "#52616f"
         except Exception as ex:
+            spacings = None
             spacing_preview.value = f"间距设置错误: {ex}"
             spacing_preview.color = "red"
+        queue_update(spacing_preview)
+        # 曲线要读历史记录再栅格化，放到后台线程，不占输入和计时器的线程
+        if preview_state["executor"] is None:
+            preview_state["executor"] = ThreadPoolExecutor(max_workers=1)
+        preview_state["executor"].submit(
+            update_spacing_curve,
+            preview_state["generation"],
+            spacings,
+            width_input.value,
+            voltage_input.value,
+            settings_selected_id["value"],
+        )
+
+    def update_spacing_curve(generation, spacings, width_value, voltage_value, preset_id):
+        curve = None
         try:
-            page.update()
+            width = float(width_value)
+            voltage = float(voltage_value)
+            reference = None
+            if spacings and width > 0:
+                reference = next(
+                    (r for r in get_history() if r.get("preset_id") == preset_id and (r.get("results") or {}).get("Rsh")),
+                    None,
+                )
+            if reference is not None:
+                curve = expected_tlm_curve(spacings, width, voltage, reference)
+                image = base64.b64encode(render_expected_curve(spacings, curve)).decode("ascii")
         except Exception:
-            pass
+            curve = None
+        if generation != preview_state["generation"]:
+            return
+        if curve is None:
+            spacing_curve_text.visible = False
+            spacing_curve_image.visible = False
+        else:
+            spacing_curve_text.value = (
+                f"按最近一次测量 ({reference.get('time', '')}) 预计: "
+                f"R {min(curve['r_list']):.2f}–{max(curve['r_list']):.2f} Ω，"
+                f"电流 {min(curve['currents']):.3g}–{max(curve['currents']):.3g} mA"
+            )
+            spacing_curve_image.src_base64 = image
+            spacing_curve_text.visible = True
+            spacing_curve_image.visible = True
+        queue_update(spacing_curve_text, spacing_curve_image)
+
+    def schedule_spacing_preview(e=None):
+        # 输入停顿 150ms 后再算；期间再次输入会顶替排队中的那一次，正在后台算的曲线也作废
+        preview_state["generation"] += 1
+        schedule_timer("spacing_preview", timer_now() + SPACING_PREVIEW_DELAY, update_spacing_preview)
 
-    tlm_count_input.on_change = update_spacing_preview
-    spacing_values_input.on_change = update_spacing_preview
+    tlm_count_input.on_change = schedule_spacing_preview
+    spacing_values_input.on_change = schedule_spacing_preview
+    width_input.on_change = schedule_spacing_preview
+    voltage_input.on_change = schedule_spacing_preview
 
     def on_settings_dropdown_change(e):
         preset = next((p for p in presets_state["items"] if p["id"] == settings_preset_dropdown.value), None)
@@ -1350,6 +2523,10 @@ def main(page):
             page.close(settings_dialog)
             page.update()
 
+    def close_settings_dialog(e=None):
+        cancel_timer("spacing_preview")
+        page.close(settings_dialog)
+
     settings_dialog = ft.AlertDialog(
         modal=True,
         title=ft.Text("设置"),
@@ -1370,13 +2547,15 @@ def main(page):
                     tlm_count_input,
                     spacing_values_input,
                     spacing_preview,
+                    spacing_curve_text,
+                    spacing_curve_image,
                 ],
                 spacing=10,
                 scroll="auto",
             ),
         ),
         actions=[
-            ft.TextButton("取消", on_click=lambda e: page.close(settings_dialog)),
+            ft.TextButton("取消", on_click=close_settings_dialog),
             ft.ElevatedButton("使用", icon="check", on_click=use_settings_preset),
             ft.ElevatedButton("保存", icon="save", bgcolor="blue", color="white", on_click=save_settings_preset),
         ],
@@ -1391,10 +2570,173 @@ def main(page):
 
     # --- 历史记录界面 ---
     history_list_view = ft.Column(scroll="auto", spacing=6)
+    history_selection = set()
+    history_thumbs = {"slots": [], "requested": set(), "executor": None}
+
+    def request_history_thumbs(first, last):
+        # 只为可见范围（前后各留几行）排队生成缩略图，全部在后台线程完成
+        slots = history_thumbs["slots"]
+        if history_thumbs["executor"] is None:
+            history_thumbs["executor"] = ThreadPoolExecutor(max_workers=2)
+        for index in range(max(0, first), min(len(slots), last + 1)):
+            record, image = slots[index]
+            key = record.get("id")
+            if key in history_thumbs["requested"]:
+                continue
+            history_thumbs["requested"].add(key)
+            history_thumbs["executor"].submit(fill_history_thumb, record, image)
+
+    def fill_history_thumb(record, image):
+        try:
+            png = load_history_thumb(record)
+        except Exception:
+            return
+        image.src_base64 = base64.b64encode(png).decode("ascii")
+        image.visible = True
+        try:
+            image.update()
+        except Exception:
+            pass
+
+    def on_history_scroll(e):
+        first = int(float(e.pixels) // HISTORY_ROW_EXTENT)
+        visible = int(float(e.viewport_dimension) // HISTORY_ROW_EXTENT) + 1
+        request_history_thumbs(first - 2, first + visible + 2)
+
+    history_list_view.on_scroll = on_history_scroll
+
+    def selected_history_records():
+        return [r for r in get_history() if r.get("id") in history_selection]
+
+    def toggle_select_all_history(e):
+        history_ids = {r.get("id") for r in get_history()}
+        if history_ids and history_ids <= history_selection:
+            history_selection.clear()
+        else:
+            history_selection.update(history_ids)
+        open_history_dialog(None)
+
+    async def export_history_pdf(e):
+        records = selected_history_records()
+        if not records:
+            show_message("请先勾选要导出的记录", "red")
+            return
+        items = []
+        for record in records:
+            try:
+                items.append(history_record_export_data(record))
+            except Exception:
+                pass
+        if not items:
+            show_message("所选记录没有可导出的数据", "red")
+            return
+        skipped = len(records) - len(items)
+
+        def write_report():
+            return write_tlm_pdf_report(items, reserve_export_path(default_export_dir(), f"TLM_report_{export_stamp()}.pdf"))
+
+        try:
+            path = await run_export_job(write_report)
+            note = f"，跳过 {skipped} 条无效记录" if skipped else ""
+            show_message(f"已导出 PDF 报告 ({len(items)} 页{note}): {path}", "green" if not skipped else "#f59e0b")
+        except Exception as ex:
+            show_message(f"导出 PDF 失败: {ex}", "red")
+
+    async def export_history_contact_sheet(e):
+        records = selected_history_records()
+        if not records:
+            show_message("请先勾选要导出的记录", "red")
+            return
+        items = []
+        for record in records:
+            try:
+                items.append(history_record_export_data(record))
+            except Exception:
+                pass
+        if not items:
+            show_message("所选记录没有可导出的数据", "red")
+            return
+        try:
+            path = await run_export_job(generate_contact_sheet, items)
+            show_message(f"已导出拼图 ({len(items)} 条记录): {path}", "green")
+        except Exception as ex:
+            show_message(f"导出拼图失败: {ex}", "red")
+
+    batch_state = {"cancel": None}
+    batch_progress_bar = ft.ProgressBar(value=0, width=dialog_width(420))
+    batch_progress_text = ft.Text("准备中...", size=13, color="#52616f")
+
+    def cancel_batch_export(e):
+        cancel_event = batch_state.get("cancel")
+        if cancel_event:
+            cancel_event.set()
+        batch_progress_text.value = "正在取消..."
+        queue_update(batch_progress_text)
+
+    batch_dialog = ft.AlertDialog(
+        modal=True,
+        title=ft.Text("批量导出 PNG"),
+        content=ft.Column(controls=[batch_progress_bar, batch_progress_text], tight=True, spacing=10),
+        actions=[ft.TextButton("取消", on_click=cancel_batch_export)],
+    )
+
+    def export_history_batch(e):
+        records = selected_history_records()
+        if not records:
+            show_message("请先勾选要导出的记录", "red")
+            return
+        if batch_state.get("cancel"):
+            show_message("批量导出正在进行中", "#f59e0b")
+            return
+        items = []
+        for record in records:
+            try:
+                items.append(history_record_export_data(record))
+            except Exception:
+                pass
+        if not items:
+            show_message("所选记录没有可导出的数据", "red")
+            return
+
+        cancel_event = threading.Event()
+        batch_state["cancel"] = cancel_event
+        batch_progress_bar.value = 0
+        batch_progress_text.value = f"0 / {len(items)}"
+        page.close(history_dialog)
+        page.open(batch_dialog)
+
+        def on_progress(done, total):
+            batch_progress_bar.value = done / total
+            batch_progress_text.value = f"{done} / {total}"
+            queue_update(batch_progress_bar, batch_progress_text)
+
+        try:
+            paths, errors = batch_export_pngs(
+                items,
+                default_export_dir(),
+                export_profile_dropdown.value,
+                progress=on_progress,
+                cancel_event=cancel_event,
+            )
+            if cancel_event.is_set():
+                show_message(f"已取消批量导出，已生成 {len(paths)} 张图片", "#f59e0b")
+            elif errors:
+                show_message(f"已导出 {len(paths)} 张，失败 {len(errors)} 张: {errors[0][1]}", "#f59e0b")
+            else:
+                show_message(f"已批量导出 {len(paths)} 张图片到 {Path(paths[0]).parent}", "green")
+        except Exception as ex:
+            show_message(f"批量导出失败: {ex}", "red")
+        finally:
+            batch_state["cancel"] = None
+            try:
+                page.close(batch_dialog)
+            except Exception:
+                pass
 
     def delete_history_item(item_id):
         history = [r for r in get_history() if r.get("id") != item_id]
         storage_set_json(HISTORY_KEY, history)
+        history_selection.discard(item_id)
         open_history_dialog(None)
 
     def restore_record(record):
@@ -1424,6 +2766,8 @@ def main(page):
             field.value = str(saved_inputs.get(float(spacing), ""))
 
         name_input.value = record.get("name", "")
+        # 输入框的值是在 apply_preset 之后才填回的，要单独推送
+        queue_update(input_col, name_input, view="tlm")
         page.close(history_dialog)
         perform_calculation(update_ui=True)
         show_message(f"已加载记录: {name_input.value}", "green")
@@ -1431,12 +2775,20 @@ def main(page):
     history_dialog = ft.AlertDialog(
         title=ft.Text(f"历史记录 (最多 {HISTORY_LIMIT} 条)"),
         content=ft.Container(content=history_list_view, width=dialog_width(680), height=dialog_height(500)),
-        actions=[ft.TextButton("关闭", on_click=lambda e: page.close(history_dialog))],
+        actions=[
+            ft.TextButton("全选", on_click=toggle_select_all_history),
+            ft.TextButton("导出 PDF", icon="picture_as_pdf", on_click=export_history_pdf),
+            ft.TextButton("批量 PNG", icon="collections", on_click=export_history_batch),
+            ft.TextButton("拼图", icon="grid_view", on_click=export_history_contact_sheet),
+            ft.TextButton("关闭", on_click=lambda e: page.close(history_dialog)),
+        ],
     )
 
     def open_history_dialog(e):
         history = get_history()
         history_list_view.controls.clear()
+        history_thumbs["slots"] = []
+        history_thumbs["requested"] = set()
         if not history:
             history_list_view.controls.append(ft.Text("暂无记录", color="#6b7280"))
         else:
@@ -1447,15 +2799,36 @@ def main(page):
                 def on_delete(ev, rid=record.get("id")):
                     delete_history_item(rid)
 
+                def on_select(ev, rid=record.get("id")):
+                    if ev.control.value:
+                        history_selection.add(rid)
+                    else:
+                        history_selection.discard(rid)
+
                 results = record.get("results", {})
                 sub = (
                     f"{record.get('time', '')}    {record.get('preset_name', '')}    "
                     f"R²={results.get('r2', 0):.5f}"
                 )
+                thumb = ft.Image(
+                    src_base64="",
+                    width=HISTORY_THUMB_WIDTH,
+                    height=HISTORY_THUMB_HEIGHT,
+                    visible=False,
+                )
+                history_thumbs["slots"].append((record, thumb))
                 history_list_view.controls.append(
                     ft.Container(
                         content=ft.Row(
                             controls=[
+                                ft.Checkbox(value=record.get("id") in history_selection, on_change=on_select),
+                                ft.Container(
+                                    content=thumb,
+                                    width=HISTORY_THUMB_WIDTH,
+                                    height=HISTORY_THUMB_HEIGHT,
+                                    bgcolor="#f1f5f9",
+                                    border_radius=4,
+                                ),
                                 ft.Column(
                                     controls=[
                                         ft.Text(record.get("name", "未命名"), weight="bold"),
@@ -1478,15 +2851,36 @@ def main(page):
         history_dialog.content.width = dialog_width(680)
         history_dialog.content.height = dialog_height(500)
         page.open(history_dialog)
+        request_history_thumbs(0, int(history_dialog.content.height // HISTORY_ROW_EXTENT) + 2)
+        history_thumbs["executor"].submit(prune_history_thumbs, history)
 
     # --- 首页 / 页面切换 ---
-    def set_page_controls(*controls):
-        page.controls.clear()
-        page.add(*controls)
+    # 每个页面第一次进入时建一次，之后切换只改根节点的 visible，客户端不用重收整棵控件树
+    page_views = {}
+
+    def show_view(view, build_controls):
+        view_state["current"] = None
+        root = page_views.get(view)
+        if root is None:
+            root = ft.Column(controls=build_controls())
+            page_views[view] = root
+            page.controls.append(root)
+        for other in page_views.values():
+            other.visible = other is root
+        page.update()
+        view_state["current"] = view
+
+    def push_timer_controls(*controls):
+        if view_state["current"] != "timer":
+            return
+        queue_update(*controls, view="timer")
 
     def render_home_page(e=None):
         page.scroll = "adaptive"
-        set_page_controls(
+        show_view("home", build_home_view)
+
+    def build_home_view():
+        return [
             ft.Container(
                 content=ft.Row(
                     controls=[
@@ -1557,7 +2951,7 @@ def main(page):
                 ),
                 alignment=ft.alignment.bottom_right,
             ),
-        )
+        ]
 
     def header_bar(title, icon_name, color, actions):
         return ft.Container(
@@ -1597,19 +2991,20 @@ def main(page):
 
     # --- 计时器页 ---
     timer_state = {
-        "countdown_stop": None,
-        "countdown_token": 0,
         "countdown_running": False,
         "countdown_end_epoch": None,
         "countdown_total": 0,
         "countdown_note": "",
-        "stopwatch_stop": None,
-        "stopwatch_token": 0,
         "stopwatch_elapsed": 0,
         "stopwatch_running": False,
         "stopwatch_start_epoch": None,
         "stopwatch_note": "",
+        "stopwatch_laps": array("d"),
     }
+    # 计次统计用 Welford 算法增量更新，计次再多也不用重算
+    lap_stats = {"n": 0, "mean": 0.0, "m2": 0.0, "min": None, "max": None}
+    LAP_PAGE_SIZE = 30
+    lap_view = {"limit": LAP_PAGE_SIZE}
 
     def format_minutes_seconds(total_seconds):
         seconds = max(0, int(total_seconds))
@@ -1658,21 +3053,97 @@ def main(page):
     stopwatch_seconds_text = ft.Text("已计时 0 秒（0 分 00 秒）", size=16, color="#111827")
     stopwatch_note_text = ft.Text("备注: -", size=13, color="#52616f")
     stopwatch_status_text = ft.Text("正计时未开始", size=13, color="#64748b")
+    lap_stats_text = ft.Text("", size=13, color="#52616f")
+    lap_list = ft.Column(spacing=2)
+    lap_more_button = ft.TextButton("显示更多计次", visible=False)
+
+    # 快照存在 client_storage，之后的变化以补丁形式追加到日志文件；
+    # 连续点击在 TIMER_JOURNAL_DELAY 内合并成一次写入，恢复时快照 + 依次重放补丁
+    # 计次不放进快照字段比较：每次计次只在日志里追加一条 lap_splits，laps 是已落盘的计次
+    timer_journal = {
+        "path": timer_journal_path(),
+        "persisted": {},
+        "laps": array("d"),
+        "pending": {},
+        "lines": 0,
+        "lock": threading.Lock(),
+        "flush_lock": threading.Lock(),
+    }
+
+    def timer_state_snapshot():
+        return {
+            "countdown_running": timer_state["countdown_running"],
+            "countdown_end_epoch": timer_state["countdown_end_epoch"],
+            "countdown_total": timer_state["countdown_total"],
+            "countdown_note": timer_state["countdown_note"],
+            "stopwatch_running": timer_state["stopwatch_running"],
+            "stopwatch_start_epoch": timer_state["stopwatch_start_epoch"],
+            "stopwatch_elapsed": timer_state["stopwatch_elapsed"],
+            "stopwatch_note": timer_state["stopwatch_note"],
+        }
+
+    def apply_timer_patch(state, laps, patch):
+        # "stopwatch_laps" 是整份计次（快照里的 base64，重置时为空），"lap_splits" 是之后追加的计次
+        for key, value in patch.items():
+            if key == "stopwatch_laps":
+                try:
+                    laps[:] = array("d", base64.b64decode(value or ""))
+                except (ValueError, TypeError):
+                    laps[:] = array("d")
+            elif key == "lap_splits":
+                laps.extend(float(v) for v in value)
+            else:
+                state[key] = value
+
+    def journal_lap(split=None):
+        # split 为 None 表示清空全部计次；同一次落盘前的多次计次合并成一个列表
+        with timer_journal["lock"]:
+            pending = timer_journal["pending"]
+            if split is None:
+                pending.pop("lap_splits", None)
+                pending["stopwatch_laps"] = ""
+            else:
+                pending.setdefault("lap_splits", []).append(split)
+        schedule_timer("timer_journal", timer_now() + TIMER_JOURNAL_DELAY, flush_timer_journal)
+
+    def timer_state_payload():
+        laps = timer_journal["laps"]
+        return {**timer_journal["persisted"], "stopwatch_laps": base64.b64encode(laps.tobytes()).decode("ascii")}
 
     def save_timer_state():
-        storage_set_json(
-            TIMER_STATE_KEY,
-            {
-                "countdown_running": timer_state["countdown_running"],
-                "countdown_end_epoch": timer_state["countdown_end_epoch"],
-                "countdown_total": timer_state["countdown_total"],
-                "countdown_note": timer_state["countdown_note"],
-                "stopwatch_running": timer_state["stopwatch_running"],
-                "stopwatch_start_epoch": timer_state["stopwatch_start_epoch"],
-                "stopwatch_elapsed": timer_state["stopwatch_elapsed"],
-                "stopwatch_note": timer_state["stopwatch_note"],
-            },
-        )
+        with timer_journal["lock"]:
+            known = {**timer_journal["persisted"], **timer_journal["pending"]}
+            patch = {k: v for k, v in timer_state_snapshot().items() if k not in known or known[k] != v}
+            if not patch:
+                return
+            timer_journal["pending"].update(patch)
+        schedule_timer("timer_journal", timer_now() + TIMER_JOURNAL_DELAY, flush_timer_journal)
+
+    def flush_timer_journal():
+        # 调度线程和生命周期回调都会来落盘，整个取出-追加-压缩过程串行执行，
+        # 否则两边交错会让日志行的顺序和 persisted 对不上
+        with timer_journal["flush_lock"]:
+            with timer_journal["lock"]:
+                patch, timer_journal["pending"] = timer_journal["pending"], {}
+                if not patch:
+                    return None
+                apply_timer_patch(timer_journal["persisted"], timer_journal["laps"], patch)
+            try:
+                append_journal(timer_journal["path"], patch)
+            except OSError:
+                # 日志不可写时退回直接写整份快照
+                storage_set_json(TIMER_STATE_KEY, timer_state_payload())
+                return None
+            timer_journal["lines"] += 1
+            if timer_journal["lines"] >= TIMER_JOURNAL_COMPACT_EVERY:
+                compact_timer_journal()
+        return None
+
+    def compact_timer_journal():
+        # 先写快照再清空日志：中途崩溃时重放的补丁都是绝对值，重复应用也没关系
+        if storage_set_json(TIMER_STATE_KEY, timer_state_payload()):
+            truncate_journal(timer_journal["path"])
+            timer_journal["lines"] = 0
 
     def update_countdown_display(remaining, note=None, status=None):
         remaining = max(0, int(remaining))
@@ -1682,33 +3153,26 @@ def main(page):
             countdown_note_text.value = f"备注: {note}" if note else "备注: -"
         if status is not None:
             countdown_status_text.value = status
-        try:
-            page.update()
-        except Exception:
-            pass
+        push_timer_controls(countdown_seconds_text, countdown_mmss_text, countdown_note_text, countdown_status_text)
 
     def stop_countdown(update_status=True):
-        stop_event = timer_state.get("countdown_stop")
-        if stop_event:
-            stop_event.set()
+        cancel_timer("countdown")
         timer_state["countdown_running"] = False
         timer_state["countdown_end_epoch"] = None
         timer_state["countdown_total"] = 0
         save_timer_state()
         if update_status:
             countdown_status_text.value = "倒计时已停止"
-            try:
-                page.update()
-            except Exception:
-                pass
+            push_timer_controls(countdown_status_text)
 
-    def refresh_countdown_from_clock(update_page=True):
+    def refresh_countdown_from_clock():
         if not timer_state["countdown_running"]:
             return
         end_epoch = timer_state.get("countdown_end_epoch")
         if not end_epoch:
             return
-        remaining = max(0, int(round(end_epoch - time.time())))
+        # 剩余时间向上取整显示，到截止时刻才算完成
+        remaining = max(0, math.ceil(end_epoch - timer_now()))
         note = timer_state.get("countdown_note", "")
         if remaining <= 0:
             timer_state["countdown_running"] = False
@@ -1717,11 +3181,6 @@ def main(page):
             save_timer_state()
         else:
             update_countdown_display(remaining, note, "倒计时进行中")
-        if update_page:
-            try:
-                page.update()
-            except Exception:
-                pass
 
     def start_countdown(total_seconds, note=""):
         try:
@@ -1734,30 +3193,28 @@ def main(page):
             return
 
         stop_countdown(update_status=False)
-        timer_state["countdown_token"] += 1
-        token = timer_state["countdown_token"]
-        stop_event = threading.Event()
-        timer_state["countdown_stop"] = stop_event
         timer_state["countdown_running"] = True
-        timer_state["countdown_end_epoch"] = time.time() + seconds
+        timer_state["countdown_end_epoch"] = timer_now() + seconds
         timer_state["countdown_total"] = seconds
         timer_state["countdown_note"] = note
         save_timer_state()
         update_countdown_display(seconds, note, "倒计时进行中")
+        arm_countdown()
 
-        def worker():
-            while not stop_event.is_set() and token == timer_state["countdown_token"]:
-                time.sleep(1)
-                if stop_event.is_set() or token != timer_state["countdown_token"]:
-                    break
-                refresh_countdown_from_clock(update_page=False)
-                if not timer_state["countdown_running"]:
-                    break
+    def next_countdown_change():
+        # 显示值是 ceil(剩余)，剩余时间跨过整数秒时变化；显示 1 时下一次就是截止时刻
+        end_epoch = timer_state["countdown_end_epoch"]
+        remaining = math.ceil(end_epoch - timer_now())
+        return end_epoch - max(0, remaining - 1)
 
-            if not stop_event.is_set() and token == timer_state["countdown_token"]:
-                refresh_countdown_from_clock(update_page=False)
+    def countdown_tick():
+        refresh_countdown_from_clock()
+        if not timer_state["countdown_running"]:
+            return None
+        return next_countdown_change()
 
-        threading.Thread(target=worker, daemon=True).start()
+    def arm_countdown():
+        schedule_timer("countdown", next_countdown_change(), countdown_tick)
 
     def start_seconds_countdown(e):
         start_countdown(second_countdown_input.value, countdown_note_input.value.strip())
@@ -1776,145 +3233,568 @@ def main(page):
 
     def reset_countdown(e):
         stop_countdown(update_status=False)
-        timer_state["countdown_token"] += 1
         timer_state["countdown_note"] = ""
         save_timer_state()
         update_countdown_display(0, "", "倒计时未开始")
 
     def update_stopwatch_display(elapsed, note=None, status=None):
-        elapsed = max(0, int(elapsed))
+        # 状态里保留精确的浮点秒数（暂停/继续和计次都以它为准），只有显示取整
+        elapsed = max(0.0, float(elapsed))
         timer_state["stopwatch_elapsed"] = elapsed
-        stopwatch_display.value = format_stopwatch(elapsed)
-        stopwatch_seconds_text.value = f"已计时 {elapsed} 秒（{format_minutes_seconds(elapsed)}）"
+        seconds = int(elapsed)
+        stopwatch_display.value = format_stopwatch(seconds)
+        stopwatch_seconds_text.value = f"已计时 {seconds} 秒（{format_minutes_seconds(seconds)}）"
         if note is not None:
             stopwatch_note_text.value = f"备注: {note}" if note else "备注: -"
         if status is not None:
             stopwatch_status_text.value = status
-        try:
-            page.update()
-        except Exception:
-            pass
+        push_timer_controls(stopwatch_display, stopwatch_seconds_text, stopwatch_note_text, stopwatch_status_text)
 
     def start_stopwatch(e):
         if timer_state["stopwatch_running"]:
             return
         note = stopwatch_note_input.value.strip()
-        timer_state["stopwatch_token"] += 1
-        token = timer_state["stopwatch_token"]
-        stop_event = threading.Event()
-        timer_state["stopwatch_stop"] = stop_event
         timer_state["stopwatch_running"] = True
-        timer_state["stopwatch_start_epoch"] = time.time() - timer_state["stopwatch_elapsed"]
+        timer_state["stopwatch_start_epoch"] = timer_now() - timer_state["stopwatch_elapsed"]
         timer_state["stopwatch_note"] = note
         save_timer_state()
         update_stopwatch_display(timer_state["stopwatch_elapsed"], note, "正计时进行中")
+        arm_stopwatch()
 
-        def worker():
-            while not stop_event.is_set() and token == timer_state["stopwatch_token"]:
-                refresh_stopwatch_from_clock(update_page=False)
-                time.sleep(1)
+    def next_stopwatch_change():
+        start_epoch = timer_state["stopwatch_start_epoch"]
+        return start_epoch + int(timer_now() - start_epoch) + 1
+
+    def stopwatch_tick():
+        refresh_stopwatch_from_clock()
+        if not timer_state["stopwatch_running"]:
+            return None
+        return next_stopwatch_change()
 
-        threading.Thread(target=worker, daemon=True).start()
+    def arm_stopwatch():
+        schedule_timer("stopwatch", next_stopwatch_change(), stopwatch_tick)
 
-    def refresh_stopwatch_from_clock(update_page=True):
+    def refresh_stopwatch_from_clock():
         if not timer_state["stopwatch_running"]:
             return
         start_epoch = timer_state.get("stopwatch_start_epoch")
         if not start_epoch:
             return
-        elapsed = max(0, int(time.time() - start_epoch))
-        update_stopwatch_display(elapsed, timer_state.get("stopwatch_note", ""), "正计时进行中")
-        if update_page:
-            try:
-                page.update()
-            except Exception:
-                pass
+        update_stopwatch_display(timer_now() - start_epoch, timer_state.get("stopwatch_note", ""), "正计时进行中")
 
     def pause_stopwatch(e):
-        stop_event = timer_state.get("stopwatch_stop")
-        if stop_event:
-            stop_event.set()
-        refresh_stopwatch_from_clock(update_page=False)
+        cancel_timer("stopwatch")
+        refresh_stopwatch_from_clock()
         timer_state["stopwatch_running"] = False
         timer_state["stopwatch_start_epoch"] = None
         save_timer_state()
         stopwatch_status_text.value = "正计时已暂停"
-        try:
-            page.update()
-        except Exception:
-            pass
+        push_timer_controls(stopwatch_status_text)
 
     def reset_stopwatch(e):
         pause_stopwatch(None)
-        timer_state["stopwatch_token"] += 1
         timer_state["stopwatch_note"] = ""
         timer_state["stopwatch_elapsed"] = 0
+        timer_state["stopwatch_laps"] = array("d")
+        rebuild_lap_stats()
         save_timer_state()
+        journal_lap(None)
         update_stopwatch_display(0, "", "正计时未开始")
+        push_timer_controls(lap_stats_text, lap_list, lap_more_button)
+
+    # --- 正计时计次：laps 里存每次计次时的累计秒数（单调时钟偏移），单圈 = 相邻两次之差 ---
+    def format_lap(seconds):
+        seconds = max(0.0, seconds)
+        minutes, remain = divmod(seconds, 60)
+        return f"{int(minutes):02d}:{remain:04.1f}"
+
+    def add_lap_stat(lap):
+        n = lap_stats["n"] + 1
+        delta = lap - lap_stats["mean"]
+        lap_stats["mean"] += delta / n
+        lap_stats["m2"] += delta * (lap - lap_stats["mean"])
+        lap_stats["n"] = n
+        lap_stats["min"] = lap if lap_stats["min"] is None else min(lap_stats["min"], lap)
+        lap_stats["max"] = lap if lap_stats["max"] is None else max(lap_stats["max"], lap)
+
+    def rebuild_lap_stats():
+        lap_stats.update(n=0, mean=0.0, m2=0.0, min=None, max=None)
+        previous = 0.0
+        for split in timer_state["stopwatch_laps"]:
+            add_lap_stat(split - previous)
+            previous = split
+        update_lap_stats_text()
+        render_lap_list(LAP_PAGE_SIZE)
+
+    def update_lap_stats_text():
+        n = lap_stats["n"]
+        if not n:
+            lap_stats_text.value = ""
+            return
+        stdev = math.sqrt(lap_stats["m2"] / (n - 1)) if n > 1 else 0.0
+        lap_stats_text.value = (
+            f"计次 {n}    平均 {format_lap(lap_stats['mean'])}    标准差 {stdev:.1f} 秒    "
+            f"最快 {format_lap(lap_stats['min'])}    最慢 {format_lap(lap_stats['max'])}"
+        )
+
+    def lap_row(index):
+        laps = timer_state["stopwatch_laps"]
+        split = laps[index]
+        lap = split - (laps[index - 1] if index else 0.0)
+        return ft.Text(f"#{index + 1}    单圈 {format_lap(lap)}    累计 {format_lap(split)}", size=13, font_family="monospace")
+
+    def render_lap_list(count):
+        # 只为最近 count 次计次建控件，更早的点“显示更多”再按页追加
+        lap_view["limit"] = count
+        total = len(timer_state["stopwatch_laps"])
+        shown = min(total, count)
+        lap_list.controls = [lap_row(index) for index in range(total - 1, total - 1 - shown, -1)]
+        lap_more_button.visible = shown < total
+
+    def show_more_laps(e):
+        render_lap_list(lap_view["limit"] + LAP_PAGE_SIZE)
+        push_timer_controls(lap_list, lap_more_button)
+
+    lap_more_button.on_click = show_more_laps
+
+    def record_lap(e):
+        if not timer_state["stopwatch_running"]:
+            show_message("正计时未在进行", "#f59e0b")
+            return
+        laps = timer_state["stopwatch_laps"]
+        split = timer_now() - timer_state["stopwatch_start_epoch"]
+        add_lap_stat(split - (laps[-1] if laps else 0.0))
+        laps.append(split)
+        journal_lap(split)
+        update_lap_stats_text()
+        lap_list.controls.insert(0, lap_row(len(laps) - 1))
+        if len(lap_list.controls) > lap_view["limit"]:
+            lap_list.controls.pop()
+            lap_more_button.visible = True
+        push_timer_controls(lap_stats_text, lap_list, lap_more_button)
 
     def refresh_timers_from_clock(e=None):
-        refresh_countdown_from_clock(update_page=False)
-        refresh_stopwatch_from_clock(update_page=False)
-        try:
-            page.update()
-        except Exception:
-            pass
+        # 不在计时器页时只更新状态，切回计时器页时随页面切换的那次 update 一起带上最新值
+        refresh_countdown_from_clock()
+        refresh_stopwatch_from_clock()
+        if named_timers["items"]:
+            arm_named_timers()
+        if recipe_state["run"]:
+            arm_recipe()
 
     def restore_timer_state():
-        saved = storage_get_json(TIMER_STATE_KEY, {})
-        if not isinstance(saved, dict):
-            return
+        snapshot = storage_get_json(TIMER_STATE_KEY, {})
+        saved, laps = {}, array("d")
+        apply_timer_patch(saved, laps, snapshot if isinstance(snapshot, dict) else {})
+        patches = read_journal(timer_journal["path"])
+        for patch in patches:
+            apply_timer_patch(saved, laps, patch)
+        timer_journal["persisted"] = dict(saved)
+        timer_journal["laps"] = laps
+        if patches:
+            compact_timer_journal()
         if saved.get("countdown_running") and saved.get("countdown_end_epoch"):
             timer_state["countdown_running"] = True
             timer_state["countdown_end_epoch"] = float(saved["countdown_end_epoch"])
             timer_state["countdown_total"] = int(saved.get("countdown_total") or 0)
             timer_state["countdown_note"] = str(saved.get("countdown_note") or "")
-            refresh_countdown_from_clock(update_page=False)
+            refresh_countdown_from_clock()
             if timer_state["countdown_running"]:
-                timer_state["countdown_token"] += 1
-                token = timer_state["countdown_token"]
-                stop_event = threading.Event()
-                timer_state["countdown_stop"] = stop_event
-
-                def countdown_worker():
-                    while not stop_event.is_set() and token == timer_state["countdown_token"]:
-                        time.sleep(1)
-                        if stop_event.is_set() or token != timer_state["countdown_token"]:
-                            break
-                        refresh_countdown_from_clock(update_page=False)
-                        if not timer_state["countdown_running"]:
-                            break
-
-                threading.Thread(target=countdown_worker, daemon=True).start()
+                arm_countdown()
         elif saved.get("countdown_note"):
             update_countdown_display(0, str(saved.get("countdown_note") or ""), "倒计时未开始")
 
-        timer_state["stopwatch_elapsed"] = int(saved.get("stopwatch_elapsed") or 0)
+        timer_state["stopwatch_elapsed"] = float(saved.get("stopwatch_elapsed") or 0)
         timer_state["stopwatch_note"] = str(saved.get("stopwatch_note") or "")
+        timer_state["stopwatch_laps"] = array("d", laps)
+        rebuild_lap_stats()
         if saved.get("stopwatch_running") and saved.get("stopwatch_start_epoch"):
             timer_state["stopwatch_running"] = True
             timer_state["stopwatch_start_epoch"] = float(saved["stopwatch_start_epoch"])
-            refresh_stopwatch_from_clock(update_page=False)
-            timer_state["stopwatch_token"] += 1
-            token = timer_state["stopwatch_token"]
-            stop_event = threading.Event()
-            timer_state["stopwatch_stop"] = stop_event
-
-            def stopwatch_worker():
-                while not stop_event.is_set() and token == timer_state["stopwatch_token"]:
-                    refresh_stopwatch_from_clock(update_page=False)
-                    time.sleep(1)
-
-            threading.Thread(target=stopwatch_worker, daemon=True).start()
+            refresh_stopwatch_from_clock()
+            arm_stopwatch()
         elif timer_state["stopwatch_elapsed"]:
             update_stopwatch_display(timer_state["stopwatch_elapsed"], timer_state["stopwatch_note"], "正计时已暂停")
 
-    page.on_app_lifecycle_state_change = refresh_timers_from_clock
+    # --- 多任务计时：任意数量的命名倒计时 / 正计时 ---
+    # 运行中的倒计时按 end_epoch 放进小顶堆，到点的从堆顶弹出；列表每次只推送数值变化的行
+    # 调度线程的 tick 和按钮回调都会改这些表，统一用 lock 保护
+    named_timers = {"items": {}, "queue": [], "rows": {}, "shown": {}, "lock": threading.RLock()}
+    named_timer_name_input = ft.TextField(label="计时名称", hint_text="例如 RTP / 后烘 / HMDS", bgcolor="white", expand=True)
+    named_timer_minutes_input = ft.TextField(label="倒计时", hint_text="例如 5", suffix_text="分钟", keyboard_type="number", bgcolor="white", width=140)
+    named_timer_list = ft.Column(spacing=6)
+
+    def save_named_timers():
+        # 紧凑格式: [id, 类型 c/s, 名称, 时间点, 时长或已计时秒数, 是否运行]
+        storage_set_json(
+            NAMED_TIMERS_KEY,
+            [
+                [t["id"], t["kind"], t["name"], t["epoch"], t["seconds"], int(t["running"])]
+                for t in named_timers["items"].values()
+            ],
+        )
+
+    def named_timer_value(timer, now):
+        if timer["kind"] == "c":
+            if not timer["running"]:
+                return "已完成" if timer["seconds"] <= 0 else format_minutes_seconds(timer["seconds"])
+            return format_minutes_seconds(max(0, math.ceil(timer["epoch"] - now)))
+        if timer["running"]:
+            return format_stopwatch(now - timer["epoch"])
+        return format_stopwatch(timer["seconds"])
+
+    def named_timer_next_change(timer, now):
+        if timer["kind"] == "c":
+            return timer["epoch"] - max(0, math.ceil(timer["epoch"] - now) - 1)
+        return timer["epoch"] + int(now - timer["epoch"]) + 1
+
+    def named_timers_tick():
+        now = timer_now()
+        finished = []
+        changed = []
+        with named_timers["lock"]:
+            queue, items = named_timers["queue"], named_timers["items"]
+            while queue and queue[0][0] <= now:
+                end_epoch, timer_id = heapq.heappop(queue)
+                timer = items.get(timer_id)
+                if timer and timer["running"] and timer["epoch"] == end_epoch:
+                    timer["running"] = False
+                    timer["seconds"] = 0
+                    finished.append(timer)
+            if finished:
+                save_named_timers()
+
+            for timer_id, timer in items.items():
+                row = named_timers["rows"].get(timer_id)
+                value = named_timer_value(timer, now)
+                if row and named_timers["shown"].get(timer_id) != value:
+                    named_timers["shown"][timer_id] = value
+                    row["value"].value = value
+                    changed.append(row["value"])
+            deadlines = [named_timer_next_change(t, now) for t in items.values() if t["running"]]
+        if finished:
+            show_message("计时完成: " + "、".join(t["name"] for t in finished), "green")
+        if changed:
+            push_timer_controls(*changed)
+        return min(deadlines) if deadlines else None
+
+    def arm_named_timers():
+        # tick 只在调度线程上跑，这里只是让它立刻执行一次
+        schedule_timer("named", timer_now(), named_timers_tick)
+
+    def named_timer_row(timer):
+        value = ft.Text(named_timer_value(timer, timer_now()), size=18, weight="bold", color="#1565c0" if timer["kind"] == "c" else "#047857")
+        named_timers["shown"][timer["id"]] = value.value
+        controls = [
+            ft.Icon("hourglass_bottom" if timer["kind"] == "c" else "timer", color="#64748b"),
+            ft.Text(timer["name"], weight="bold", expand=True),
+            value,
+        ]
+        if timer["kind"] == "s":
+            controls.append(ft.IconButton(
+                "pause" if timer["running"] else "play_arrow",
+                tooltip="暂停" if timer["running"] else "继续",
+                on_click=lambda e, tid=timer["id"]: toggle_named_stopwatch(tid),
+            ))
+        controls.append(ft.IconButton("delete", tooltip="删除", icon_color="red", on_click=lambda e, tid=timer["id"]: remove_named_timer(tid)))
+        named_timers["rows"][timer["id"]] = {"value": value}
+        return ft.Container(
+            content=ft.Row(controls=controls, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+            padding=ft.padding.symmetric(horizontal=10, vertical=4),
+            bgcolor="#f8fafc",
+            border_radius=6,
+        )
+
+    def rebuild_named_timer_list(update_page=True):
+        # 结构变化（增删、暂停）才重建整个列表；倒计时按到期先后排在前面
+        with named_timers["lock"]:
+            named_timers["rows"].clear()
+            named_timers["shown"].clear()
+            ordered = sorted(
+                named_timers["items"].values(),
+                key=lambda t: (t["kind"] != "c", not t["running"], t["epoch"] if t["kind"] == "c" else 0),
+            )
+            named_timer_list.controls = [named_timer_row(t) for t in ordered] or [ft.Text("暂无计时", size=13, color="#64748b")]
+        if update_page:
+            push_timer_controls(named_timer_list)
+
+    def add_named_timer(kind):
+        name = (named_timer_name_input.value or "").strip() or ("倒计时" if kind == "c" else "正计时")
+        now = timer_now()
+        timer = {"id": _new_id("timer"), "kind": kind, "name": name, "epoch": now, "seconds": 0, "running": True}
+        if kind == "c":
+            try:
+                seconds = int(round(float(named_timer_minutes_input.value) * 60))
+            except Exception:
+                show_message("请输入有效的分钟数", "red")
+                return
+            if seconds <= 0:
+                show_message("倒计时时长必须大于 0", "red")
+                return
+            timer["epoch"] = now + seconds
+            timer["seconds"] = seconds
+        with named_timers["lock"]:
+            if kind == "c":
+                heapq.heappush(named_timers["queue"], (timer["epoch"], timer["id"]))
+            named_timers["items"][timer["id"]] = timer
+            save_named_timers()
+        rebuild_named_timer_list()
+        arm_named_timers()
+
+    def toggle_named_stopwatch(timer_id):
+        with named_timers["lock"]:
+            timer = named_timers["items"].get(timer_id)
+            if not timer:
+                return
+            now = timer_now()
+            if timer["running"]:
+                # 保留小数部分，反复暂停/继续不会每次丢掉不足一秒的计时；只在显示时取整
+                timer["seconds"] = now - timer["epoch"]
+                timer["running"] = False
+            else:
+                timer["epoch"] = now - timer["seconds"]
+                timer["running"] = True
+            save_named_timers()
+        rebuild_named_timer_list()
+        arm_named_timers()
+
+    def remove_named_timer(timer_id):
+        # 堆里的旧条目不必删除，出堆时发现 id 不存在就跳过
+        with named_timers["lock"]:
+            named_timers["items"].pop(timer_id, None)
+            save_named_timers()
+        rebuild_named_timer_list()
+        arm_named_timers()
+
+    def restore_named_timers():
+        saved = storage_get_json(NAMED_TIMERS_KEY, [])
+        if not isinstance(saved, list):
+            return
+        for entry in saved:
+            try:
+                timer_id, kind, name, epoch, seconds, running = entry
+                timer = {
+                    "id": str(timer_id),
+                    "kind": "c" if kind == "c" else "s",
+                    "name": str(name),
+                    "epoch": float(epoch),
+                    "seconds": float(seconds),
+                    "running": bool(running),
+                }
+            except Exception:
+                continue
+            named_timers["items"][timer["id"]] = timer
+        named_timers["queue"] = [
+            (t["epoch"], t["id"]) for t in named_timers["items"].values() if t["kind"] == "c" and t["running"]
+        ]
+        heapq.heapify(named_timers["queue"])
+        rebuild_named_timer_list(update_page=False)
+        if named_timers["items"]:
+            arm_named_timers()
+
+    # --- 流程配方：按顺序自动衔接的多步倒计时，跑在同一个调度线程上 ---
+    recipe_state = {"run": None, "log": [], "recipes": [], "lock": threading.RLock()}
+    recipe_dropdown = ft.Dropdown(label="流程", bgcolor="white", expand=True)
+    recipe_step_text = ft.Text("流程未开始", size=20, weight="bold", color="#7c3aed")
+    recipe_remaining_text = ft.Text("", size=16, color="#111827")
+    recipe_steps_text = ft.Text("", size=13, color="#52616f")
+    recipe_stats_text = ft.Text("", size=12, color="#64748b")
+
+    def get_recipes():
+        saved = storage_get_json(RECIPES_KEY, None)
+        recipes = [normalize_recipe(r) for r in saved if isinstance(r, dict)] if isinstance(saved, list) else []
+        return [r for r in recipes if r["steps"]] or [normalize_recipe(r) for r in default_recipes()]
+
+    def find_recipe(recipe_id):
+        return next((r for r in recipe_state["recipes"] if r["id"] == recipe_id), None)
+
+    def refresh_recipe_dropdown():
+        recipe_state["recipes"] = get_recipes()
+        recipe_dropdown.options = [option(r["id"], r["name"]) for r in recipe_state["recipes"]]
+        if not find_recipe(recipe_dropdown.value):
+            recipe_dropdown.value = recipe_state["recipes"][0]["id"]
+        update_recipe_steps_text()
+
+    def update_recipe_steps_text():
+        recipe = find_recipe(recipe_dropdown.value)
+        if not recipe:
+            return
+        run = recipe_state["run"]
+        current = run["step"] if run and run["recipe_id"] == recipe["id"] else -1
+        recipe_steps_text.value = "  →  ".join(
+            f"[{step['name']} {_format_number(step['minutes'])}分]" if index == current else f"{step['name']} {_format_number(step['minutes'])}分"
+            for index, step in enumerate(recipe["steps"])
+        )
+        recipe_stats_text.value = recipe_stats_summary(recipe)
+
+    def recipe_stats_summary(recipe):
+        # 按步骤汇总历次实际用时，便于和计划时长对比
+        totals = {}
+        for entry in recipe_state["log"]:
+            if entry.get("recipe_id") != recipe["id"]:
+                continue
+            for name, planned, actual in entry.get("steps", []):
+                count, total = totals.get(name, (0, 0.0))
+                totals[name] = (count + 1, total + actual)
+        if not totals:
+            return "暂无运行记录"
+        return "平均实际用时: " + "  ".join(
+            f"{name} {format_minutes_seconds(total / count)}" for name, (count, total) in totals.items()
+        )
+
+    def save_recipe_run():
+        storage_set_json(RECIPE_RUN_KEY, recipe_state["run"])
+
+    def log_recipe_step(run, recipe, actual):
+        step = recipe["steps"][run["step"]]
+        run["steps"].append([step["name"], round(step["minutes"] * 60, 1), round(max(0.0, actual), 1)])
+
+    def finish_recipe_run(run, recipe, completed):
+        recipe_state["log"].insert(0, {
+            "recipe_id": recipe["id"],
+            "recipe": recipe["name"],
+            "started": run["started"],
+            "steps": run["steps"],
+            "completed": completed,
+        })
+        recipe_state["log"] = recipe_state["log"][:RECIPE_LOG_LIMIT]
+        storage_set_json(RECIPE_LOG_KEY, recipe_state["log"])
+        recipe_state["run"] = None
+        save_recipe_run()
+
+    def begin_recipe_step(run, recipe, index, start_epoch):
+        run["step"] = index
+        run["step_start"] = start_epoch
+        run["step_end"] = start_epoch + recipe["steps"][index]["minutes"] * 60
+
+    def advance_recipe(now, actual_end):
+        # 结束当前步骤并衔接下一步；actual_end 是这一步实际结束的时间点
+        run = recipe_state["run"]
+        recipe = find_recipe(run["recipe_id"])
+        log_recipe_step(run, recipe, actual_end - run["step_start"])
+        if run["step"] + 1 >= len(recipe["steps"]):
+            finish_recipe_run(run, recipe, completed=True)
+            show_message(f"{recipe['name']} 已完成", "green")
+            return
+        begin_recipe_step(run, recipe, run["step"] + 1, actual_end)
+        save_recipe_run()
+        show_message(f"{recipe['name']}: 开始 {recipe['steps'][run['step']]['name']}", "#7c3aed")
+
+    def update_recipe_display(now):
+        run = recipe_state["run"]
+        if run:
+            recipe = find_recipe(run["recipe_id"])
+            step = recipe["steps"][run["step"]]
+            recipe_step_text.value = f"{recipe['name']} · 第 {run['step'] + 1}/{len(recipe['steps'])} 步: {step['name']}"
+            recipe_remaining_text.value = f"剩余 {format_minutes_seconds(max(0, math.ceil(run['step_end'] - now)))}"
+        else:
+            recipe_step_text.value = "流程未开始"
+            recipe_remaining_text.value = ""
+        update_recipe_steps_text()
+        push_timer_controls(recipe_step_text, recipe_remaining_text, recipe_steps_text, recipe_stats_text)
+
+    def recipe_tick():
+        with recipe_state["lock"]:
+            now = timer_now()
+            run = recipe_state["run"]
+            if run and now >= run["step_end"]:
+                advance_recipe(now, run["step_end"])
+            update_recipe_display(now)
+            run = recipe_state["run"]
+            if not run:
+                return None
+            return run["step_end"] - max(0, math.ceil(run["step_end"] - now) - 1)
+
+    def arm_recipe():
+        # 步骤只在调度线程里推进；界面事件改完状态后让调度器立刻跑一次 tick
+        schedule_timer("recipe", timer_now(), recipe_tick)
+
+    def end_recipe_run(run):
+        # 流程定义可能已被删掉，这时没有步骤可补记，只清掉进行中的状态
+        recipe = find_recipe(run["recipe_id"])
+        if recipe:
+            log_recipe_step(run, recipe, timer_now() - run["step_start"])
+            finish_recipe_run(run, recipe, completed=False)
+        else:
+            recipe_state["run"] = None
+            save_recipe_run()
+
+    def start_recipe(e):
+        recipe = find_recipe(recipe_dropdown.value)
+        if not recipe:
+            show_message("请选择流程", "red")
+            return
+        with recipe_state["lock"]:
+            if recipe_state["run"]:
+                end_recipe_run(recipe_state["run"])
+            now = timer_now()
+            run = {"recipe_id": recipe["id"], "started": now, "steps": []}
+            begin_recipe_step(run, recipe, 0, now)
+            recipe_state["run"] = run
+            save_recipe_run()
+        arm_recipe()
+
+    def skip_recipe_step(e):
+        with recipe_state["lock"]:
+            if not recipe_state["run"]:
+                return
+            now = timer_now()
+            advance_recipe(now, now)
+        arm_recipe()
+
+    def stop_recipe(e):
+        with recipe_state["lock"]:
+            if not recipe_state["run"]:
+                return
+            end_recipe_run(recipe_state["run"])
+        arm_recipe()
+
+    def restore_recipe_state():
+        log = storage_get_json(RECIPE_LOG_KEY, [])
+        recipe_state["log"] = log if isinstance(log, list) else []
+        refresh_recipe_dropdown()
+        run = storage_get_json(RECIPE_RUN_KEY, None)
+        if not isinstance(run, dict) or not find_recipe(run.get("recipe_id")):
+            return
+        try:
+            run["step"] = int(run["step"])
+            run["step_start"] = float(run["step_start"])
+            run["step_end"] = float(run["step_end"])
+        except (KeyError, TypeError, ValueError):
+            return
+        run.setdefault("steps", [])
+        recipe_dropdown.value = run["recipe_id"]
+        with recipe_state["lock"]:
+            recipe_state["run"] = run
+            # App 关闭期间到期的步骤按计划时长补记并顺延
+            now = timer_now()
+            while recipe_state["run"] and recipe_state["run"]["step_end"] <= now:
+                advance_recipe(now, recipe_state["run"]["step_end"])
+        arm_recipe()
+
+    recipe_dropdown.on_change = lambda e: update_recipe_display(timer_now())
+
+    def on_app_lifecycle_change(e=None):
+        state = str(getattr(e, "data", "") or "").lower()
+        if any(word in state for word in ("pause", "inactive", "hide", "detach")):
+            # 切到后台可能被系统杀掉，合并中的改动立即落盘
+            cancel_timer("timer_journal")
+            flush_timer_journal()
+        if "resume" in state:
+            resync_timer_clock()
+            invalidate_export_dir()
+            prefetch_export_dir()
+        refresh_timers_from_clock(e)
+
+    page.on_app_lifecycle_state_change = on_app_lifecycle_change
 
     def render_timer_page(e=None):
         refresh_timers_from_clock()
         page.scroll = "adaptive"
-        set_page_controls(
+        show_view("timer", build_timer_view)
+
+    def build_timer_view():
+        return [
             header_bar(
                 "计时器",
                 "timer",
@@ -2030,14 +3910,18 @@ def main(page):
                         ),
                         ft.ResponsiveRow(
                             controls=[
-                                ft.ElevatedButton("开始", icon="play_arrow", bgcolor="#047857", color="white", col={"xs": 4, "sm": 4}, on_click=start_stopwatch),
-                                ft.ElevatedButton("暂停", icon="pause", col={"xs": 4, "sm": 4}, on_click=pause_stopwatch),
-                                ft.ElevatedButton("重置", icon="restart_alt", col={"xs": 4, "sm": 4}, on_click=reset_stopwatch),
+                                ft.ElevatedButton("开始", icon="play_arrow", bgcolor="#047857", color="white", col={"xs": 6, "sm": 3}, on_click=start_stopwatch),
+                                ft.ElevatedButton("计次", icon="flag", col={"xs": 6, "sm": 3}, on_click=record_lap),
+                                ft.ElevatedButton("暂停", icon="pause", col={"xs": 6, "sm": 3}, on_click=pause_stopwatch),
+                                ft.ElevatedButton("重置", icon="restart_alt", col={"xs": 6, "sm": 3}, on_click=reset_stopwatch),
                             ],
                             columns=12,
                             spacing=8,
                             run_spacing=8,
                         ),
+                        lap_stats_text,
+                        lap_list,
+                        lap_more_button,
                     ],
                     spacing=10,
                 ),
@@ -2046,11 +3930,70 @@ def main(page):
                 border_radius=8,
                 border=ft.border.all(1, "#d9e2ec"),
             ),
-        )
+            ft.Container(height=10),
+            ft.Container(
+                content=ft.Column(
+                    controls=[
+                        ft.Text("流程配方", weight="bold", size=18),
+                        recipe_dropdown,
+                        recipe_steps_text,
+                        ft.Container(
+                            content=ft.Column(controls=[recipe_step_text, recipe_remaining_text], spacing=4),
+                            bgcolor="#f5f3ff",
+                            padding=14,
+                            border_radius=6,
+                        ),
+                        ft.ResponsiveRow(
+                            controls=[
+                                ft.ElevatedButton("开始流程", icon="play_arrow", bgcolor="#7c3aed", color="white", col={"xs": 4, "sm": 4}, on_click=start_recipe),
+                                ft.ElevatedButton("下一步", icon="skip_next", col={"xs": 4, "sm": 4}, on_click=skip_recipe_step),
+                                ft.ElevatedButton("结束", icon="stop", col={"xs": 4, "sm": 4}, on_click=stop_recipe),
+                            ],
+                            columns=12,
+                            spacing=8,
+                            run_spacing=8,
+                        ),
+                        recipe_stats_text,
+                    ],
+                    spacing=10,
+                ),
+                bgcolor="white",
+                padding=14,
+                border_radius=8,
+                border=ft.border.all(1, "#d9e2ec"),
+            ),
+            ft.Container(height=10),
+            ft.Container(
+                content=ft.Column(
+                    controls=[
+                        ft.Text("多任务计时", weight="bold", size=18),
+                        ft.Row(controls=[named_timer_name_input, named_timer_minutes_input]),
+                        ft.ResponsiveRow(
+                            controls=[
+                                ft.ElevatedButton("添加倒计时", icon="hourglass_bottom", bgcolor="blue", color="white", col={"xs": 6, "sm": 6}, on_click=lambda e: add_named_timer("c")),
+                                ft.ElevatedButton("添加正计时", icon="timer", col={"xs": 6, "sm": 6}, on_click=lambda e: add_named_timer("s")),
+                            ],
+                            columns=12,
+                            spacing=8,
+                            run_spacing=8,
+                        ),
+                        named_timer_list,
+                    ],
+                    spacing=10,
+                ),
+                bgcolor="white",
+                padding=14,
+                border_radius=8,
+                border=ft.border.all(1, "#d9e2ec"),
+            ),
+        ]
 
     def render_tlm_page(e=None):
         page.scroll = "adaptive"
-        set_page_controls(
+        show_view("tlm", build_tlm_view)
+
+    def build_tlm_view():
+        return [
             header_bar(
                 "TLM 计算",
                 "science",
@@ -2080,6 +4023,12 @@ def main(page):
                     ft.ElevatedButton("保存记录", icon="save", bgcolor="green", color="white", expand=True, on_click=on_save_click),
                 ]
             ),
+            ft.Row(
+                controls=[
+                    export_profile_dropdown,
+                    ft.ElevatedButton("导出 SVG", icon="polyline", on_click=on_save_svg_click),
+                ]
+            ),
             ft.Row(
                 controls=[
                     ft.ElevatedButton("保存到相册", icon="photo_library", expand=True, on_click=on_save_album_click),
@@ -2087,6 +4036,7 @@ def main(page):
                     ft.ElevatedButton("分享", icon="share", expand=True, on_click=on_share_click),
                 ]
             ),
+            export_progress,
             ft.Container(height=12),
             ft.Text("分析结果", weight="bold"),
             ft.Container(content=result_text, bgcolor="#eaf3ff", padding=12, border_radius=6),
@@ -2104,14 +4054,18 @@ def main(page):
                 alignment=ft.alignment.bottom_right,
                 margin=ft.margin.only(top=24, bottom=20),
             ),
-        )
+        ]
 
     # --- 初始 UI 状态 ---
+    refresh_export_profile_dropdown()
     refresh_preset_dropdown()
     update_summary()
     rebuild_current_inputs(clear_inputs=True)
     restore_timer_state()
+    restore_named_timers()
+    restore_recipe_state()
     render_home_page()
+    prefetch_export_dir()
 
 
 def safe_main(page):